@@ -1,12 +1,22 @@
+from .core.buffer import OverflowPolicy
+from .core.restart import RestartMode, RestartPolicy
+from .core.scheduler import Priority
+from .core.subscription import Subscription
 from .core.supervisor import MCSR
 from .interface import BasicLogger, ILogger
 from .model.event import _EVENT_ARGS_CTX as eargs
 from .model.event import _SERVER_CTX as server
-from .model.event import (Event, MCSR_AllLoaded, MCSR_AllStopped,
-                          MCSR_ExtsLoaded, MCSR_Output, MCSR_Stderr,
-                          MCSR_Stdin, MCSR_Stdout, ServerBeforeStart,
-                          ServerBeforeStop, ServerEvent, ServerLoaded,
-                          ServerOutput, ServerStopped, SupervisorEvent)
+from .model.event import (Event, HandlerScope, MCSR_AllLoaded, MCSR_AllStopped,
+                          MCSR_ExtsLoaded, MCSR_Output, MCSR_StartupReport,
+                          MCSR_Stderr, MCSR_Stdin, MCSR_Stdout,
+                          ServerBeforeStart, ServerBeforeStop, ServerCrashed,
+                          ServerEvent, ServerLoaded, ServerMetrics,
+                          ServerOutput, ServerStopped, ServerTickAlert,
+                          SupervisorEvent, consume)
+from .model.instrument import HandlerMonitor
+from .model.line import ConsoleLine, LogParser
+from .model.runner import ExecPolicy
 from .utils.parser import CmdParser
 from .utils.tools import PathUtils
 from .utils.formatter import Colors, JsonText, Texts
+from .utils.metrics import MetricFamily, MetricsRegistry
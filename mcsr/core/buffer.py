@@ -0,0 +1,129 @@
+import asyncio
+from collections import deque
+
+from ..model.line import ConsoleLine
+from ..typing import *
+
+
+class OverflowPolicy(Enum):
+    # 缓冲区满时阻塞读取器，背压传导至 JVM 管道
+    block = 'block'
+    # 缓冲区满时丢弃最旧的行
+    drop_oldest = 'drop_oldest'
+    # 缓冲区满时合并与缓冲区中待分发行内容相同的行，其余行仍然阻塞
+    coalesce = 'coalesce'
+
+
+class LineBuffer:
+    def __init__(self, maxsize: int=10000, policy: Union[OverflowPolicy, str]=OverflowPolicy.block) -> None:
+        if maxsize <= 0:
+            raise ValueError("行缓冲区容量必须为正整数")
+        self.maxsize = maxsize
+        self.policy = OverflowPolicy(policy)
+
+        self.lines_in = 0
+        self.lines_dropped = 0
+        self.lines_coalesced = 0
+        self.blocked_time = 0.0
+        self.high_watermark = 0
+
+        self._queue: Deque[ConsoleLine] = deque()
+        self._contents: Dict[str, int] = {}
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'size': len(self._queue),
+            'maxsize': self.maxsize,
+            'policy': self.policy.value,
+            'lines_in': self.lines_in,
+            'lines_dropped': self.lines_dropped,
+            'lines_coalesced': self.lines_coalesced,
+            'blocked_time': self.blocked_time,
+            'high_watermark': self.high_watermark,
+        }
+
+    def _append(self, line: ConsoleLine) -> None:
+        self._queue.append(line)
+        if self.policy is OverflowPolicy.coalesce:
+            self._contents[line.content] = self._contents.get(line.content, 0) + 1
+        self.lines_in += 1
+        if len(self._queue) > self.high_watermark:
+            self.high_watermark = len(self._queue)
+        if len(self._queue) >= self.maxsize:
+            self._not_full.clear()
+
+    def _popleft(self) -> ConsoleLine:
+        line = self._queue.popleft()
+        if self.policy is OverflowPolicy.coalesce:
+            cnt = self._contents[line.content] - 1
+            if cnt:
+                self._contents[line.content] = cnt
+            else:
+                del self._contents[line.content]
+        return line
+
+    async def _wait_not_full(self) -> None:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            await self._not_full.wait()
+        finally:
+            self.blocked_time += loop.time() - start
+
+    async def put_many(self, lines: List[ConsoleLine]) -> None:
+        if self._closed:
+            raise RuntimeError("行缓冲区已关闭")
+        for line in lines:
+            if len(self._queue) >= self.maxsize:
+                if self.policy is OverflowPolicy.drop_oldest:
+                    self._popleft()
+                    self.lines_dropped += 1
+                elif self.policy is OverflowPolicy.coalesce and line.content in self._contents:
+                    self.lines_coalesced += 1
+                    continue
+                else:
+                    self._not_empty.set()
+                    await self._wait_not_full()
+            self._append(line)
+        if len(self._queue):
+            self._not_empty.set()
+
+    async def get_many(self, max_lines: int=256) -> Optional[List[ConsoleLine]]:
+        # 缓冲区关闭且取空后返回 None
+        while not len(self._queue):
+            if self._closed:
+                return None
+            self._not_empty.clear()
+            await self._not_empty.wait()
+
+        n = min(max_lines, len(self._queue))
+        lines = [self._popleft() for _ in range(n)]
+        if not len(self._queue):
+            self._not_empty.clear()
+        if len(self._queue) < self.maxsize:
+            self._not_full.set()
+        return lines
+
+    def close(self) -> None:
+        # 同时唤醒阻塞中的写入方，关闭后不再等待取出
+        self._closed = True
+        self._not_empty.set()
+        self._not_full.set()
+
+    def reopen(self) -> None:
+        self._closed = False
+        if not len(self._queue):
+            self._not_empty.clear()
+        if len(self._queue) >= self.maxsize:
+            self._not_full.clear()
@@ -0,0 +1,173 @@
+import asyncio
+from asyncio import StreamReader, StreamWriter
+
+from ..interface import ILogger, ISupervisor
+from ..typing import *
+from ..utils.metrics import MetricFamily, MetricsRegistry
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+# 以 Prometheus 文本格式提供指标的最小 HTTP 服务：只响应 GET/HEAD /metrics，每个连接处理一个请求后关闭
+class MetricsExporter:
+    def __init__(self, registry: MetricsRegistry, host: str='127.0.0.1', port: int=9108,
+                 logger: ILogger=None, timeout: float=5) -> None:
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.logger = logger
+        self.timeout = timeout
+        self.scrapes = 0
+
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    async def start(self) -> None:
+        if self._server is not None:
+            return
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        if self.port == 0:
+            # 端口为 0 时由系统分配，记录实际端口
+            self.port = self._server.sockets[0].getsockname()[1]
+        if self.logger is not None:
+            self.logger.log(f"指标服务已启动：http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _read_request(self, reader: StreamReader) -> Optional[Tuple[str, str]]:
+        request = await reader.readline()
+        parts = request.decode('latin-1').split()
+        if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+            return None
+        # 请求头与请求体都不需要，读到空行为止
+        for _ in range(100):
+            header = await reader.readline()
+            if header in (b'\r\n', b'\n', b''):
+                return parts[0], parts[1]
+        return None
+
+    async def _handle(self, reader: StreamReader, writer: StreamWriter) -> None:
+        try:
+            request = await asyncio.wait_for(self._read_request(reader), timeout=self.timeout)
+            method = None
+            if request is None:
+                status, body = 400, b''
+            else:
+                method, path = request
+                path = path.split('?', 1)[0]
+                if path not in ('/metrics', '/'):
+                    status, body = 404, b''
+                elif method not in ('GET', 'HEAD'):
+                    status, body = 405, b''
+                else:
+                    status, body = 200, self.registry.render().encode('utf-8')
+                    self.scrapes += 1
+            head = (f'HTTP/1.1 {status} {_REASONS[status]}\r\n'
+                    f'Content-Type: {CONTENT_TYPE}\r\n'
+                    f'Content-Length: {len(body)}\r\n'
+                    'Connection: close\r\n\r\n')
+            writer.write(head.encode('latin-1') + (body if method != 'HEAD' else b''))
+            await asyncio.wait_for(writer.drain(), timeout=self.timeout)
+        except (asyncio.TimeoutError, ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+# MCSR 内置指标：服务端运行状态、读取与缓冲、命令队列、重启、进程资源与事件处理器统计，均在抓取时即时读取
+def core_metrics(supervisor: ISupervisor) -> Iterator[MetricFamily]:
+    servers = supervisor.servers.values()
+
+    def per_server(name: str, type: str, help: str, get: Callable[[Any], Optional[float]]) -> MetricFamily:
+        family = MetricFamily(name, type, help)
+        for server in servers:
+            value = get(server)
+            if value is not None:
+                family.add(value, server=server.id)
+        return family
+
+    yield per_server('mcsr_server_running', 'gauge', '服务端进程是否在运行',
+                     lambda s: int(s.running_flag.is_set()))
+    yield per_server('mcsr_server_loaded', 'gauge', '服务端是否已完成加载',
+                     lambda s: int(s.running_flag.is_set() and s.loaded_flag.is_set()))
+    yield per_server('mcsr_server_restarts_total', 'counter', '服务端自动重启次数',
+                     lambda s: s.restart_policy.restarts)
+    yield per_server('mcsr_server_lines_read_total', 'counter', '从服务端读取的输出行数',
+                     lambda s: s._reader.seq if s._reader is not None else 0)
+    yield per_server('mcsr_server_lines_dropped_total', 'counter', '输出缓冲区溢出丢弃的行数',
+                     lambda s: s.line_buffer.lines_dropped)
+    yield per_server('mcsr_server_lines_coalesced_total', 'counter', '输出缓冲区溢出合并的行数',
+                     lambda s: s.line_buffer.lines_coalesced)
+    yield per_server('mcsr_server_line_buffer_depth', 'gauge', '输出缓冲区中待分发的行数',
+                     lambda s: len(s.line_buffer))
+    yield per_server('mcsr_server_line_buffer_blocked_seconds_total', 'counter', '读取因输出缓冲区已满而等待的总时间',
+                     lambda s: s.line_buffer.blocked_time)
+    yield per_server('mcsr_server_dispatch_inflight', 'gauge', '进行中与执行器中排队的输出处理调用数',
+                     lambda s: s._event_bus.inflight)
+    yield per_server('mcsr_server_command_queue_depth', 'gauge', '调度器中等待发送的命令数',
+                     lambda s: s.scheduler.queue_depth)
+    yield per_server('mcsr_server_stdin_queue_depth', 'gauge', '等待写入 stdin 的命令数',
+                     lambda s: s.writer.queue_depth)
+    yield per_server('mcsr_server_commands_written_total', 'counter', '已写入 stdin 的命令数',
+                     lambda s: s.writer.commands_written)
+    # reason：cosmetic_evicted 为低优先级命令队列满时挤出的旧命令，stdin_full 为 stdin 待写入命令过多时拒绝的命令，
+    # not_running 为服务端进程未运行时拒绝的命令
+    dropped = MetricFamily('mcsr_server_commands_dropped_total', 'counter', '未发送即被丢弃或拒绝的命令数')
+    for server in servers:
+        dropped.add(server.scheduler.dropped, server=server.id, reason='cosmetic_evicted')
+        dropped.add(server.writer.commands_rejected, server=server.id, reason='stdin_full')
+        dropped.add(server.scheduler.rejected, server=server.id, reason='not_running')
+    yield dropped
+    yield per_server('mcsr_server_cpu_percent', 'gauge', '服务端进程 CPU 占用百分比',
+                     lambda s: s.sampler.latest.cpu_percent if s.sampler.latest is not None else None)
+    yield per_server('mcsr_server_rss_bytes', 'gauge', '服务端进程常驻内存字节数',
+                     lambda s: s.sampler.latest.rss if s.sampler.latest is not None else None)
+
+    tps = MetricFamily('mcsr_server_tps', 'gauge', '最近一次探测的每秒 tick 数')
+    mspt = MetricFamily('mcsr_server_mspt', 'gauge', '最近一次探测的每 tick 毫秒数')
+    for server in servers:
+        latest = server.tick_probe.series.latest()
+        if latest is not None:
+            tps.add(latest['tps'], server=server.id)
+            mspt.add(latest['mspt'], server=server.id)
+    yield tps
+    yield mspt
+
+    # 处理器统计按处理器名合并了所有服务端
+    calls = MetricFamily('mcsr_handler_calls_total', 'counter', '事件处理器调用次数')
+    errors = MetricFamily('mcsr_handler_errors_total', 'counter', '事件处理器抛出异常的次数')
+    inflight = MetricFamily('mcsr_handler_inflight', 'gauge', '进行中的事件处理器调用数')
+    slow = MetricFamily('mcsr_handler_slow_calls_total', 'counter', '单步阻塞事件循环超过阈值的次数')
+    max_block = MetricFamily('mcsr_handler_max_block_seconds', 'gauge', '单步阻塞事件循环的最长时间')
+    latency = MetricFamily('mcsr_handler_latency_seconds', 'histogram', '事件处理器执行耗时')
+    line_delay = MetricFamily('mcsr_handler_line_delay_seconds', 'histogram', '输出行读取到处理器开始执行的时间')
+    if supervisor.monitor_enabled:
+        for name, stats in supervisor.monitor.handlers.items():
+            calls.add(stats.calls, handler=name)
+            errors.add(stats.errors, handler=name)
+            inflight.add(stats.inflight, handler=name)
+            slow.add(stats.slow_calls, handler=name)
+            max_block.add(stats.max_block, handler=name)
+            latency.add(stats.latency, handler=name)
+            if stats.line_delay.count:
+                line_delay.add(stats.line_delay, handler=name)
+    yield from (calls, errors, inflight, slow, max_block, latency, line_delay)
+
+    # 设置了执行策略的处理器的积压与丢弃，每个服务端的执行器分别统计；MCSR 自身事件的执行器 server 标签为空
+    queue = MetricFamily('mcsr_handler_queue_depth', 'gauge', '执行器中排队的处理器调用数')
+    dropped = MetricFamily('mcsr_handler_dropped_total', 'counter', '执行器丢弃的处理器调用数')
+    for server_id, bus in (('', supervisor._self_bus), *((server.id, server._event_bus) for server in servers)):
+        for handler, runner in bus._runners.items():
+            queue.add(runner.queue_depth, handler=handler.name, server=server_id)
+            dropped.add(runner.dropped, handler=handler.name, server=server_id)
+    yield queue
+    yield dropped
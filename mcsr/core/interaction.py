@@ -0,0 +1,70 @@
+import asyncio
+import re
+from asyncio import Future
+
+from ..model.matcher import compile_pattern, first_match
+from ..typing import *
+
+
+class PendingMatch:
+    __slots__ = ('expect', 'block', 'deadline', 'match_reuse', 'future')
+
+    def __init__(self, expect: re.Pattern, block: Optional[re.Pattern], deadline: Optional[float], match_reuse: bool, future: Future) -> None:
+        self.expect = expect
+        self.block = block
+        self.deadline = deadline
+        self.match_reuse = match_reuse
+        self.future = future
+
+
+# 等待中的交互匹配表：读取器对每一行调用 feed，决定该行是否继续正常分发
+class MatcherTable:
+    def __init__(self) -> None:
+        self._pending: Dict[int, PendingMatch] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, expect_pattern: Union[str, re.Pattern], block_pattern: Union[str, re.Pattern, None]=None,
+            timeout: float=None, match_reuse: bool=False) -> PendingMatch:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+        pending = PendingMatch(
+            compile_pattern(expect_pattern),
+            compile_pattern(block_pattern) if block_pattern else None,
+            deadline, match_reuse, loop.create_future()
+        )
+        self._pending[id(pending)] = pending
+        return pending
+
+    def discard(self, pending: PendingMatch) -> None:
+        self._pending.pop(id(pending), None)
+
+    def feed(self, output: str) -> bool:
+        passed = True
+        now = None
+        for key, pending in tuple(self._pending.items()):
+            if pending.future.done():
+                self._pending.pop(key, None)
+                continue
+            if pending.deadline is not None:
+                if now is None:
+                    now = asyncio.get_running_loop().time()
+                if now >= pending.deadline:
+                    continue
+
+            matched = first_match(pending.expect, output)
+            if matched is not None:
+                self._pending.pop(key, None)
+                pending.future.set_result(matched)
+                if not pending.match_reuse:
+                    return False
+            elif pending.block is not None and pending.block.search(output):
+                passed = False
+        return passed
+
+    def cancel_all(self) -> None:
+        for pending in self._pending.values():
+            if not pending.future.done():
+                pending.future.set_result(None)
+        self._pending.clear()
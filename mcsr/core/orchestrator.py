@@ -0,0 +1,189 @@
+import asyncio
+import time
+from asyncio import Future, Task
+
+from ..interface import IServer
+from ..typing import *
+
+ORCHESTRATION_PHASES = ('queued', 'deps_ready', 'started', 'loaded')
+
+
+# 分批启动编排：限制同时处于启动阶段（已启动、尚未加载完成或退出）的服务端数量，
+# 支持依赖顺序、“加载完成后再启动下一个”与相邻两次启动的最小间隔
+class StartupOrchestrator:
+    def __init__(self, max_concurrent: int=None, wait_loaded: bool=False, stagger: float=0) -> None:
+        self.max_concurrent = max_concurrent
+        self.wait_loaded = wait_loaded
+        self.stagger = stagger
+        self.depends: Dict[str, List[str]] = {}
+        self.timeline: Dict[str, Dict[str, Optional[float]]] = {}
+        self._validate()
+
+        self._begin: Optional[float] = None
+        self._servers: Dict[str, IServer] = {}
+        self._last_launch: Optional[float] = None
+        # 每个服务端是否真正加载完成：加载完成为 True，未加载即结束运行（或未启动）为 False
+        self._loaded: Dict[str, Future] = {}
+
+    def configure(self, max_concurrent: int=None, wait_loaded: bool=None, stagger: float=None) -> None:
+        if max_concurrent is not None:
+            self.max_concurrent = max_concurrent
+        if wait_loaded is not None:
+            self.wait_loaded = wait_loaded
+        if stagger is not None:
+            self.stagger = stagger
+        self._validate()
+
+    def _validate(self) -> None:
+        if self.max_concurrent is not None and self.max_concurrent < 1:
+            raise ValueError("同时启动的服务端数量上限必须为正整数")
+        if self.stagger < 0:
+            raise ValueError("启动间隔不能为负数")
+        # wait_loaded 即逐个启动，与大于 1 的并发上限互相矛盾
+        if self.wait_loaded and self.max_concurrent is not None and self.max_concurrent > 1:
+            raise ValueError("wait_loaded 要求逐个启动，不能与大于 1 的 max_concurrent 同时设置")
+
+    @property
+    def concurrency(self) -> Optional[int]:
+        return 1 if self.wait_loaded else self.max_concurrent
+
+    def _check(self, servers: Dict[str, IServer]) -> None:
+        for id, deps in self.depends.items():
+            for dep in deps:
+                if dep not in servers:
+                    raise ValueError(f"服务端 {id} 依赖不存在的服务器 id：{dep}")
+        # 深度优先检查依赖环
+        state: Dict[str, int] = {}
+        def visit(id: str) -> None:
+            state[id] = 1
+            for dep in self.depends.get(id, ()):
+                if state.get(dep) == 1:
+                    raise ValueError(f"服务端启动依赖存在环：{id} -> {dep}")
+                if state.get(dep) is None:
+                    visit(dep)
+            state[id] = 2
+        for id in servers.keys():
+            if state.get(id) is None:
+                visit(id)
+
+    def start(self, servers: Dict[str, IServer], run: Callable[[IServer], Coroutine],
+              stopping: Callable[[], bool]=lambda: False) -> List[Task]:
+        # 返回每个服务端的任务，任务在对应服务端彻底停止（或因停止请求而不再启动）后结束
+        self._check(servers)
+        self._begin = time.time()
+        self._servers = servers
+        self._last_launch = None
+        self.timeline = {id: {phase: None for phase in ORCHESTRATION_PHASES} for id in servers.keys()}
+        loop = asyncio.get_running_loop()
+        self._loaded = {id: loop.create_future() for id in servers.keys()}
+        slots = asyncio.Semaphore(self.concurrency) if self.concurrency else None
+        gate = asyncio.Lock()
+        return [asyncio.create_task(self._launch(server, servers, slots, gate, run, stopping))
+                for server in servers.values()]
+
+    def _mark(self, id: str, phase: str, stamp: float=None) -> None:
+        if self.timeline[id][phase] is None:
+            self.timeline[id][phase] = stamp if stamp is not None else time.time()
+
+    def _mark_loaded(self, server: IServer) -> None:
+        # 优先使用 Done 行的读取时间，事件循环调度的先后不影响记录
+        self._mark(server.id, 'loaded', server.startup.stamps['done'])
+
+    async def _launch(self, server: IServer, servers: Dict[str, IServer], slots: Optional[asyncio.Semaphore],
+                      gate: asyncio.Lock, run: Callable[[IServer], Coroutine], stopping: Callable[[], bool]) -> None:
+        self._mark(server.id, 'queued')
+        for dep in self.depends.get(server.id, ()):
+            # loaded flag 在未加载即退出时也会设置，依赖须等待真正的加载完成
+            if not await asyncio.shield(self._loaded[dep]):
+                server.logger.log(f"依赖的服务端 {dep} 未能加载完成，服务端 {server.id} 不再启动")
+                return self._skip(server)
+        self._mark(server.id, 'deps_ready')
+
+        def cancelled() -> bool:
+            return stopping() or server.stop_requested
+
+        if cancelled():
+            return self._skip(server)
+        if slots is not None:
+            await slots.acquire()
+        try:
+            if self.stagger:
+                # 所有服务端共用一个间隔：前一个启动满 stagger 秒后才启动下一个
+                async with gate:
+                    if self._last_launch is not None:
+                        delay = self._last_launch + self.stagger - time.time()
+                        if delay > 0 and not cancelled():
+                            await asyncio.sleep(delay)
+                    self._last_launch = time.time()
+            if cancelled():
+                return self._skip(server)
+
+            self._mark(server.id, 'started')
+            run_task = asyncio.create_task(run(server))
+            watch_task = asyncio.create_task(self._watch_loaded(server, run_task))
+            try:
+                # 启动名额保持到加载完成或不再运行
+                await watch_task
+                if slots is not None:
+                    slots.release()
+                    slots = None
+                await run_task
+            finally:
+                watch_task.cancel()
+                self._resolve(server, False)
+        finally:
+            if slots is not None:
+                slots.release()
+
+    async def _watch_loaded(self, server: IServer, run_task: Task) -> None:
+        while True:
+            await self._wait_either(run_task, server.loaded_flag)
+            if server.startup.finished:
+                self._mark_loaded(server)
+                return self._resolve(server, True)
+            if run_task.done():
+                return self._resolve(server, False)
+            # 进程未加载即退出：自动重启时 loaded flag 被清除、进程启动后 running flag 重新设置，等待下一次启动
+            if server.running_flag.is_set():
+                await asyncio.sleep(0.1)
+            else:
+                await self._wait_either(run_task, server.running_flag)
+
+    @staticmethod
+    async def _wait_either(task: Task, flag: asyncio.Event) -> None:
+        waiter = asyncio.create_task(flag.wait())
+        try:
+            await asyncio.wait((task, waiter), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+
+    def _resolve(self, server: IServer, loaded: bool) -> None:
+        fut = self._loaded.get(server.id)
+        if fut is not None and not fut.done():
+            fut.set_result(loaded)
+
+    def _skip(self, server: IServer) -> None:
+        # 不再启动（已请求停止或依赖未能加载）：依赖它的服务端随之跳过；
+        # 与非正常结束一样设置 loaded flag，MCSR 不会一直等待
+        self._resolve(server, False)
+        server.loaded_flag.set()
+
+    def report(self) -> Dict[str, Any]:
+        servers = {}
+        last_loaded = None
+        for id, stamps in self.timeline.items():
+            server = self._servers.get(id)
+            if stamps['loaded'] is None and stamps['started'] is not None and server is not None and server.startup.finished:
+                self._mark_loaded(server)
+            servers[id] = {
+                phase: (stamp - self._begin if stamp is not None else None)
+                for phase, stamp in stamps.items()
+            }
+            loaded = stamps['loaded']
+            if loaded is not None and (last_loaded is None or loaded > last_loaded):
+                last_loaded = loaded
+        return {
+            'begin': self._begin,
+            'all_loaded': last_loaded - self._begin if last_loaded is not None else None,
+            'servers': servers,
+        }
@@ -0,0 +1,121 @@
+import asyncio
+import math
+import re
+import time
+from asyncio import Task
+
+from ..interface import IServer
+from ..model.event import EventArgs, ServerTickAlert
+from ..typing import *
+from ..utils.series import TimeSeries
+from .scheduler import Priority
+
+
+class TickProfile:
+    __slots__ = ('command', 'expect', 'block', 'parse')
+
+    def __init__(self, command: str, expect: str, block: Optional[str],
+                 parse: Callable[[Tuple[str, ...]], Tuple[float, float]]) -> None:
+        self.command = command
+        self.expect = re.compile(expect)
+        self.block = re.compile(block) if block else None
+        # 解析匹配结果为 (tps, mspt)，无法得到的值为 nan
+        self.parse = parse
+
+
+def _forge_parse(m: Tuple[str, ...]) -> Tuple[float, float]:
+    return float(m[1]), float(m[0])
+
+
+def _neoforge_parse(m: Tuple[str, ...]) -> Tuple[float, float]:
+    return float(m[0]), float(m[1])
+
+
+def _paper_parse(m: Tuple[str, ...]) -> Tuple[float, float]:
+    # 取最近 1 分钟的 TPS，paper 的 tps 命令不提供 mspt
+    return float(m[0]), math.nan
+
+
+def _vanilla_parse(m: Union[str, Tuple[str, ...]]) -> Tuple[float, float]:
+    mspt = float(m[0])
+    target = float(m[1])
+    return min(1000 / target, 1000 / mspt) if mspt > 0 else 1000 / target, mspt
+
+
+TICK_PROFILES: Dict[str, TickProfile] = {
+    'forge': TickProfile('forge tps', r'Overall\s*:\s*Mean tick time: ([\d.]+) ms\. Mean TPS: ([\d.]+)',
+                         r'Mean tick time: [\d.]+ ms', _forge_parse),
+    'neoforge': TickProfile('neoforge tps', r'Overall\s*:\s*([\d.]+) TPS \(([\d.]+) ms/tick\)',
+                            r'TPS \([\d.]+ ms/tick\)', _neoforge_parse),
+    'paper': TickProfile('tps', r'TPS from last 1m, 5m, 15m: \W*([\d.]+)', None, _paper_parse),
+    # 1.20.3 及以上的原版 tick 命令，fabric 同样适用
+    'vanilla': TickProfile('tick query', r'Average time per tick: ([\d.]+)ms \(Target: ([\d.]+)ms\)',
+                           r'The game is running normally|Target tick rate|Percentiles|P\d+: ', _vanilla_parse),
+}
+TICK_PROFILES['fabric'] = TICK_PROFILES['vanilla']
+
+
+# 周期性查询服务端 TPS/MSPT，保存时间序列，并在越过阈值时触发 ServerTickAlert 事件
+class TickProbe:
+    def __init__(self, server: IServer, interval: Optional[float]=None, mspt_threshold: float=50.0,
+                 tps_threshold: float=18.0, capacity: int=2880, timeout: float=5) -> None:
+        self.server = server
+        self.interval = interval
+        self.mspt_threshold = mspt_threshold
+        self.tps_threshold = tps_threshold
+        self.timeout = timeout
+        self.profile: Optional[TickProfile] = None
+        self.series = TimeSeries(('tps', 'mspt'), capacity)
+        self.lagging = False
+        self.failures = 0
+
+        self._task: Task = None
+
+    def start(self) -> None:
+        if self.interval is None:
+            return
+        self.stop()
+        self._task = asyncio.create_task(self._probe_loop())
+
+    def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    def _resolve_profile(self) -> TickProfile:
+        if self.profile is not None:
+            return self.profile
+        parser = self.server.log_parser
+        server_type = parser.server_type
+        if server_type == 'auto' and parser.layout is not None:
+            server_type = parser.layout.name
+        return TICK_PROFILES.get(server_type, TICK_PROFILES['vanilla'])
+
+    async def probe(self) -> Optional[Tuple[float, float]]:
+        profile = self._resolve_profile()
+        matched = await self.server.interact(profile.command, profile.expect, timeout=self.timeout,
+                                             block_pattern=profile.block, priority=Priority.maintenance)
+        if matched is None:
+            self.failures += 1
+            return None
+        tps, mspt = profile.parse(matched if isinstance(matched, tuple) else (matched,))
+        self.series.append(time.time(), {'tps': tps, 'mspt': mspt})
+        await self._check(tps, mspt)
+        return tps, mspt
+
+    async def _check(self, tps: float, mspt: float) -> None:
+        # nan 与任何数比较都为 False，缺失的指标不会触发告警
+        lagging = mspt > self.mspt_threshold or tps < self.tps_threshold
+        if lagging == self.lagging:
+            return
+        self.lagging = lagging
+        await self.server._event_bus.emit(ServerTickAlert, EventArgs(lagging=lagging, tps=tps, mspt=mspt))
+
+    async def _probe_loop(self) -> None:
+        try:
+            await self.server.loaded_flag.wait()
+            while True:
+                await self.probe()
+                await asyncio.sleep(self.interval)
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,69 @@
+import asyncio
+import time
+from asyncio import StreamReader, Task
+
+from ..model.line import ConsoleLine, LogParser
+from ..typing import *
+
+
+# 多路复用的控制台读取器：以大块方式同时读取多个管道并批量切分行，
+# 每行标记来源流与单调递增的序号，所有管道 EOF 后自行结束
+class ConsoleReader:
+    def __init__(self, streams: Dict[str, StreamReader], sink: Callable[[List[ConsoleLine]], Awaitable[None]],
+                 chunk_size: int=65536, encoding: str='utf-8', start_seq: int=0, parser: LogParser=None) -> None:
+        self.streams = streams
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.parser = parser
+        self.seq = start_seq
+        self.lines_read = 0
+        self.bytes_read = 0
+
+        self._sink = sink
+        self._tails: Dict[str, bytes] = {name: b'' for name in streams.keys()}
+
+    def _split(self, name: str, data: bytes, now: float) -> List[ConsoleLine]:
+        parts = (self._tails[name] + data).split(b'\n')
+        self._tails[name] = parts.pop()
+        return self._make_lines(name, parts, now)
+
+    def _make_lines(self, name: str, parts: List[bytes], now: float) -> List[ConsoleLine]:
+        lines = []
+        for part in parts:
+            content = part.decode(self.encoding, errors='replace').rstrip('\r')
+            if not content:
+                continue
+            self.seq += 1
+            lines.append(ConsoleLine(self.seq, name, content, now, self.parser))
+        self.lines_read += len(lines)
+        return lines
+
+    async def run(self) -> None:
+        pending: Dict[Task, str] = {
+            asyncio.ensure_future(reader.read(self.chunk_size)): name
+            for name, reader in self.streams.items()
+        }
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+                now = time.time()
+                lines: List[ConsoleLine] = []
+                for task in done:
+                    name = pending.pop(task)
+                    data = task.result()
+                    if not data:
+                        # 该管道已 EOF，冲刷残留的不完整行后不再读取
+                        tail = self._tails[name]
+                        self._tails[name] = b''
+                        if tail:
+                            lines.extend(self._make_lines(name, [tail], now))
+                        continue
+                    self.bytes_read += len(data)
+                    lines.extend(self._split(name, data, now))
+                    pending[asyncio.ensure_future(self.streams[name].read(self.chunk_size))] = name
+
+                if len(lines):
+                    await self._sink(lines)
+        finally:
+            for task in pending.keys():
+                task.cancel()
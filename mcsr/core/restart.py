@@ -0,0 +1,64 @@
+import time
+from collections import deque
+
+from ..typing import *
+
+
+class RestartMode(Enum):
+    # 进程退出后不再启动
+    never = 'never'
+    # 仅在非主动停止且退出码非 0 时重启
+    on_crash = 'on_crash'
+    # 非主动停止的任何退出都重启
+    always = 'always'
+
+
+class RestartPolicy:
+    def __init__(self, mode: Union[RestartMode, str]=RestartMode.never, backoff_initial: float=5.0,
+                 backoff_factor: float=2.0, backoff_max: float=300.0, max_restarts: int=5,
+                 window: float=600.0, stable_after: float=300.0) -> None:
+        self.mode = RestartMode(mode)
+        self.backoff_initial = backoff_initial
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        # window 秒内最多重启 max_restarts 次，超出视为崩溃循环并放弃重启
+        self.max_restarts = max_restarts
+        self.window = window
+        # 单次运行超过 stable_after 秒后退避时间重置
+        self.stable_after = stable_after
+
+        self.restarts = 0
+        self.crash_loop = False
+        self._consecutive = 0
+        self._history: Deque[float] = deque()
+
+    def reset(self) -> None:
+        self.crash_loop = False
+        self._consecutive = 0
+        self._history.clear()
+
+    @staticmethod
+    def is_crash(returncode: Optional[int], requested: bool) -> bool:
+        return not requested and returncode != 0
+
+    def next_delay(self, returncode: Optional[int], uptime: float, requested: bool) -> Optional[float]:
+        # 返回重启前的等待秒数，不重启时返回 None
+        if requested or self.mode is RestartMode.never:
+            return None
+        if self.mode is RestartMode.on_crash and not self.is_crash(returncode, requested):
+            return None
+
+        now = time.time()
+        while len(self._history) and now - self._history[0] > self.window:
+            self._history.popleft()
+        if len(self._history) >= self.max_restarts:
+            self.crash_loop = True
+            return None
+
+        if uptime >= self.stable_after:
+            self._consecutive = 0
+        delay = min(self.backoff_max, self.backoff_initial * self.backoff_factor ** self._consecutive)
+        self._consecutive += 1
+        self._history.append(now)
+        self.restarts += 1
+        return delay
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import time
+from asyncio import Task
+
+from ..interface import IServer
+from ..model.event import EventArgs, ServerMetrics
+from ..typing import *
+from ..utils.series import TimeSeries
+
+_CLK_TCK = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+METRIC_FIELDS = ('cpu_time', 'cpu_percent', 'rss', 'threads', 'fds', 'read_bytes', 'write_bytes')
+
+
+class ProcessSample:
+    __slots__ = ('time',) + METRIC_FIELDS
+
+    def __init__(self, time: float, cpu_time: float, rss: int, threads: int, fds: Optional[int],
+                 read_bytes: Optional[int], write_bytes: Optional[int]) -> None:
+        self.time = time
+        self.cpu_time = cpu_time
+        self.cpu_percent: Optional[float] = None
+        self.rss = rss
+        self.threads = threads
+        self.fds = fds
+        self.read_bytes = read_bytes
+        self.write_bytes = write_bytes
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+def read_proc(pid: int) -> ProcessSample:
+    # procfs 由内核在内存中生成，读取不会因磁盘 IO 阻塞，直接同步读取比线程池往返更省
+    now = time.time()
+    with open(f'/proc/{pid}/stat', 'rb') as fp:
+        stat = fp.read()
+    # 进程名可能包含空格与括号，从最后一个右括号之后开始按字段切分
+    fields = stat[stat.rindex(b')') + 2:].split()
+    cpu_time = (int(fields[11]) + int(fields[12])) / _CLK_TCK
+    threads = int(fields[17])
+    rss = int(fields[21]) * _PAGE_SIZE
+
+    try:
+        fds = len(os.listdir(f'/proc/{pid}/fd'))
+    except OSError:
+        fds = None
+
+    read_bytes = write_bytes = None
+    try:
+        with open(f'/proc/{pid}/io', 'rb') as fp:
+            for row in fp.read().splitlines():
+                if row.startswith(b'read_bytes:'):
+                    read_bytes = int(row.split()[1])
+                elif row.startswith(b'write_bytes:'):
+                    write_bytes = int(row.split()[1])
+    except OSError:
+        pass
+    return ProcessSample(now, cpu_time, rss, threads, fds, read_bytes, write_bytes)
+
+
+# 周期性采样服务端 JVM 进程资源占用，保存滚动时间序列并触发 ServerMetrics 事件
+class ProcessSampler:
+    def __init__(self, server: IServer, interval: Optional[float]=1.0, capacity: int=3600) -> None:
+        self.server = server
+        self.interval = interval
+        self.series = TimeSeries(METRIC_FIELDS, capacity)
+        self.latest: Optional[ProcessSample] = None
+
+        self._task: Task = None
+        self._supported = os.path.isdir('/proc/self')
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval is not None and self._supported
+
+    def start(self, pid: int) -> None:
+        if not self.enabled:
+            return
+        self.stop()
+        self.latest = None
+        self._task = asyncio.create_task(self._sample_loop(pid))
+
+    def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    async def _sample_loop(self, pid: int) -> None:
+        try:
+            while True:
+                try:
+                    sample = read_proc(pid)
+                except (OSError, ValueError, IndexError):
+                    # 进程已退出
+                    return
+                prev = self.latest
+                if prev is not None and sample.time > prev.time:
+                    sample.cpu_percent = (sample.cpu_time - prev.cpu_time) / (sample.time - prev.time) * 100
+                self.latest = sample
+                self.series.append(sample.time, sample.as_dict())
+                await self.server._event_bus.emit(ServerMetrics, EventArgs(sample=sample))
+                await asyncio.sleep(self.interval)
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,236 @@
+import asyncio
+from asyncio import Task
+from collections import deque
+
+from ..model.event import _PLUGIN_VAR
+from ..typing import *
+from .writer import CommandWriter
+
+
+class Priority(Enum):
+    # 管理员控制台输入，不受限流约束
+    admin = 0
+    # 备份、保存等维护类命令
+    maintenance = 1
+    # tellraw 欢迎语、跨服消息等装饰性命令，负载高时可被合并或丢弃
+    cosmetic = 2
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int=None) -> None:
+        if rate <= 0:
+            raise ValueError("令牌生成速率必须为正数")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._last = asyncio.get_running_loop().time()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def delay(self, n: int, now: float) -> float:
+        # 距离能够取出 n 个令牌还需等待的秒数，批量超过容量时按装满计算
+        self._refill(now)
+        need = min(n, self.burst)
+        if self._tokens >= need:
+            return 0.0
+        return (need - self._tokens) / self.rate
+
+    def take(self, n: int, now: float) -> None:
+        self._refill(now)
+        self._tokens -= n
+
+
+class _Command:
+    __slots__ = ('contents', 'priority', 'plugin', 'enqueued')
+
+    def __init__(self, contents: List[str], priority: Priority, plugin: Optional[str], enqueued: float) -> None:
+        self.contents = contents
+        self.priority = priority
+        self.plugin = plugin
+        self.enqueued = enqueued
+
+
+class CommandScheduler:
+    # 位于 CommandWriter 之上的优先级调度器：按优先级出队，并对服务端与插件分别做令牌桶限流
+    def __init__(self, writer: CommandWriter, rate: float=None, burst: int=None, plugin_rate: float=None,
+                 plugin_burst: int=None, cosmetic_limit: int=1000, merge_cosmetic: bool=True) -> None:
+        self.writer = writer
+        self.cosmetic_limit = cosmetic_limit
+        self.merge_cosmetic = merge_cosmetic
+
+        self.dropped = 0
+        self.merged = 0
+        self.rejected = 0
+        self.wait_count = {p: 0 for p in Priority}
+        self.wait_total = {p: 0.0 for p in Priority}
+        self.wait_max = {p: 0.0 for p in Priority}
+
+        self._rate = (rate, burst)
+        self._plugin_rate = (plugin_rate, plugin_burst)
+        self._bucket: Optional[TokenBucket] = None
+        self._plugin_buckets: Dict[Optional[str], Optional[TokenBucket]] = {}
+        self._plugin_overrides: Dict[str, Tuple[float, Optional[int]]] = {}
+        self._queues: Dict[Priority, Deque[_Command]] = {p: deque() for p in Priority}
+        self._cosmetic_pending: Dict[str, int] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Task = None
+
+    def set_rate(self, rate: Optional[float], burst: int=None) -> None:
+        self._rate = (rate, burst)
+        self._bucket = None
+
+    def set_plugin_rate(self, rate: Optional[float], burst: int=None, plugin: str=None) -> None:
+        # 不指定 plugin 时修改所有插件的默认限流
+        if plugin is None:
+            self._plugin_rate = (rate, burst)
+        else:
+            self._plugin_overrides[plugin] = (rate, burst)
+        self._plugin_buckets.clear()
+
+    def _server_bucket(self) -> Optional[TokenBucket]:
+        if self._bucket is None and self._rate[0] is not None:
+            self._bucket = TokenBucket(*self._rate)
+        return self._bucket
+
+    def _plugin_bucket(self, plugin: Optional[str]) -> Optional[TokenBucket]:
+        if plugin in self._plugin_buckets:
+            return self._plugin_buckets[plugin]
+        rate, burst = self._plugin_overrides.get(plugin, self._plugin_rate)
+        bucket = TokenBucket(rate, burst) if rate is not None and plugin is not None else None
+        self._plugin_buckets[plugin] = bucket
+        return bucket
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queue_depth': {p.name: len(q) for p, q in self._queues.items()},
+            'dropped': self.dropped,
+            'merged': self.merged,
+            'rejected': self.rejected,
+            'wait_count': {p.name: v for p, v in self.wait_count.items()},
+            'wait_avg': {p.name: self.wait_total[p] / self.wait_count[p] if self.wait_count[p] else 0.0 for p in Priority},
+            'wait_max': {p.name: v for p, v in self.wait_max.items()},
+        }
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._schedule_loop())
+
+    def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        for q in self._queues.values():
+            q.clear()
+        self._cosmetic_pending.clear()
+
+    def _delay(self, cmd: _Command, now: float) -> float:
+        if cmd.priority is Priority.admin:
+            return 0.0
+        n = len(cmd.contents)
+        delay = 0.0
+        bucket = self._server_bucket()
+        if bucket is not None:
+            delay = bucket.delay(n, now)
+        bucket = self._plugin_bucket(cmd.plugin)
+        if bucket is not None:
+            delay = max(delay, bucket.delay(n, now))
+        return delay
+
+    def _dispatch(self, cmd: _Command, now: float) -> bool:
+        if cmd.priority is not Priority.admin:
+            bucket = self._server_bucket()
+            if bucket is not None:
+                bucket.take(len(cmd.contents), now)
+            bucket = self._plugin_bucket(cmd.plugin)
+            if bucket is not None:
+                bucket.take(len(cmd.contents), now)
+
+        wait = now - cmd.enqueued
+        self.wait_count[cmd.priority] += 1
+        self.wait_total[cmd.priority] += wait
+        if wait > self.wait_max[cmd.priority]:
+            self.wait_max[cmd.priority] = wait
+        return self.writer.submit(cmd.contents)
+
+    def submit(self, contents: List[str], priority: Priority=Priority.maintenance, plugin: str=None) -> bool:
+        if not self.writer.attached:
+            # 进程未运行时不排队，停止时队列已清空，重新启动后不会补发
+            self.rejected += len(contents)
+            return False
+        if plugin is None:
+            plugin = _PLUGIN_VAR.get(None)
+        now = asyncio.get_running_loop().time()
+        cmd = _Command(contents, priority, plugin, now)
+
+        # 没有同级或更高优先级的命令在排队且令牌充足时直接交给写任务
+        if not any(len(self._queues[p]) for p in Priority if p.value <= priority.value) and self._delay(cmd, now) == 0:
+            return self._dispatch(cmd, now)
+
+        if priority is Priority.cosmetic:
+            key = '\n'.join(contents)
+            if self.merge_cosmetic and key in self._cosmetic_pending:
+                self.merged += 1
+                return True
+            queue = self._queues[priority]
+            if len(queue) >= self.cosmetic_limit:
+                old = queue.popleft()
+                self._forget_cosmetic(old)
+                self.dropped += 1
+            self._cosmetic_pending[key] = self._cosmetic_pending.get(key, 0) + 1
+
+        self._queues[priority].append(cmd)
+        self._wakeup.set()
+        return True
+
+    def _forget_cosmetic(self, cmd: _Command) -> None:
+        key = '\n'.join(cmd.contents)
+        cnt = self._cosmetic_pending.get(key, 0) - 1
+        if cnt > 0:
+            self._cosmetic_pending[key] = cnt
+        else:
+            self._cosmetic_pending.pop(key, None)
+
+    async def _schedule_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                if not self.queue_depth:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                now = loop.time()
+                min_delay = None
+                for p in Priority:
+                    queue = self._queues[p]
+                    if not len(queue):
+                        continue
+                    cmd = queue[0]
+                    delay = self._delay(cmd, now)
+                    if delay == 0:
+                        queue.popleft()
+                        if p is Priority.cosmetic:
+                            self._forget_cosmetic(cmd)
+                        self._dispatch(cmd, now)
+                        min_delay = 0
+                        break
+                    if min_delay is None or delay < min_delay:
+                        min_delay = delay
+
+                if min_delay:
+                    # 令牌不足时休眠到最近一个命令可发送，期间有新命令提交也会被唤醒
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=min_delay)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,107 @@
+import re
+import time
+from array import array
+
+from ..model.line import ConsoleLine, LogParser
+from ..model.matcher import compile_pattern
+from ..typing import *
+
+_STREAM_CODES = {'stdout': 0, 'stderr': 1}
+_STREAM_NAMES = ('stdout', 'stderr')
+
+
+# 定长环形回滚缓冲：序号、时间戳、来源流保存在紧凑数组中，内存占用固定
+class Scrollback:
+    def __init__(self, capacity: int=5000, parser: LogParser=None) -> None:
+        if capacity <= 0:
+            raise ValueError("回滚缓冲容量必须为正整数")
+        self.capacity = capacity
+        self.parser = parser
+        self._seqs = array('q', bytes(8 * capacity))
+        self._times = array('d', bytes(8 * capacity))
+        self._streams = bytearray(capacity)
+        self._contents: List[Optional[str]] = [None] * capacity
+        # 下一个写入位置与当前行数
+        self._head = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def first_seq(self) -> Optional[int]:
+        return self._seqs[self._pos(0)] if self._size else None
+
+    @property
+    def last_seq(self) -> Optional[int]:
+        return self._seqs[self._pos(self._size - 1)] if self._size else None
+
+    def _pos(self, i: int) -> int:
+        # 逻辑下标（0 为最旧）到数组下标
+        return (self._head - self._size + i) % self.capacity
+
+    def _line(self, i: int) -> ConsoleLine:
+        p = self._pos(i)
+        return ConsoleLine(self._seqs[p], _STREAM_NAMES[self._streams[p]], self._contents[p], self._times[p], self.parser)
+
+    def extend(self, lines: List[ConsoleLine]) -> None:
+        cap = self.capacity
+        head = self._head
+        for line in lines:
+            self._seqs[head] = line.seq
+            self._times[head] = line.time
+            self._streams[head] = _STREAM_CODES.get(line.stream, 0)
+            self._contents[head] = line.content
+            head += 1
+            if head == cap:
+                head = 0
+        self._head = head
+        self._size = min(cap, self._size + len(lines))
+
+    def clear(self) -> None:
+        self._contents = [None] * self.capacity
+        self._head = 0
+        self._size = 0
+
+    def _bisect(self, values: array, x: Union[int, float], left: bool=False) -> int:
+        # 返回第一个值大于（left 时为不小于）x 的逻辑下标，序号与时间戳均单调不减
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            v = values[self._pos(mid)]
+            if v < x or (not left and v == x):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def last(self, n: int) -> List[ConsoleLine]:
+        n = max(0, min(n, self._size))
+        return [self._line(i) for i in range(self._size - n, self._size)]
+
+    def since(self, seq: int, limit: int=None) -> List[ConsoleLine]:
+        # 序号大于 seq 的所有行
+        start = self._bisect(self._seqs, seq)
+        end = self._size if limit is None else min(self._size, start + limit)
+        return [self._line(i) for i in range(start, end)]
+
+    def search(self, pattern: Union[str, re.Pattern], window: float=None, start: float=None, end: float=None,
+               stream: str=None, limit: int=None) -> List[ConsoleLine]:
+        # window 表示最近若干秒，也可直接给出 [start, end] 时间戳区间
+        if window is not None:
+            start = time.time() - window
+        regex = compile_pattern(pattern)
+        lo = 0 if start is None else self._bisect(self._times, start, left=True)
+        hi = self._size if end is None else self._bisect(self._times, end)
+        code = _STREAM_CODES.get(stream) if stream is not None else None
+
+        res = []
+        for i in range(lo, hi):
+            p = self._pos(i)
+            if code is not None and self._streams[p] != code:
+                continue
+            if regex.search(self._contents[p]):
+                res.append(self._line(i))
+                if limit is not None and len(res) >= limit:
+                    break
+        return res
@@ -1,15 +1,29 @@
 import asyncio
-import re
 import subprocess
-from asyncio import Future, Lock, Queue, StreamReader, StreamWriter, Task
+import time
+from asyncio import Future, StreamReader, StreamWriter, Task
 from asyncio.subprocess import Process
 
 from ..interface import ILogger, IServer, IServerLoader
-from ..model.event import (EventArgs, ServerBeforeStart, ServerBeforeStop,
-                           ServerEvent, ServerEventBus, ServerHandler,
-                           ServerLoaded, ServerOutput, ServerStopped)
+from ..model.event import (EventArgs, HandlerScope, ServerBeforeStart,
+                           ServerBeforeStop, ServerCrashed, ServerEvent,
+                           ServerEventBus, ServerHandler, ServerLoaded,
+                           ServerOutput, ServerStopped)
+from ..model.line import ConsoleLine, LogParser
+from ..model.runner import ExecPolicy
 from ..typing import *
 from ..utils.tools import PathUtils
+from .buffer import LineBuffer, OverflowPolicy
+from .interaction import MatcherTable
+from .probe import TickProbe
+from .reader import ConsoleReader
+from .sampler import ProcessSampler
+from .restart import RestartMode, RestartPolicy
+from .scheduler import CommandScheduler, Priority
+from .scrollback import Scrollback
+from .startup import StartupTimeline
+from .subscription import Subscription
+from .writer import CommandWriter
 
 
 class ServerLoader(IServerLoader):
@@ -33,21 +47,39 @@ class ServerLoader(IServerLoader):
 
 
 class Server(IServer):
-    def __init__(self, id: str, server_loader: ServerLoader, server_logger: ILogger, world_name: str='world') -> None:
+    def __init__(self, id: str, server_loader: ServerLoader, server_logger: ILogger, world_name: str='world',
+                 buffer_size: int=10000, overflow_policy: Union[OverflowPolicy, str]=OverflowPolicy.block, max_inflight: int=1000,
+                 scrollback_size: int=5000, server_type: str='auto', max_pending_cmds: int=10000,
+                 cmd_rate: float=None, plugin_cmd_rate: float=None, sample_interval: Optional[float]=1.0,
+                 tick_probe_interval: Optional[float]=None, restart_policy: Union[RestartPolicy, RestartMode, str]=None) -> None:
         self.id = id
         self.proc: Process = None
         self.stdin: StreamWriter = None
         self.stdout: StreamReader = None
         self.stderr: StreamReader = None
         self.logger = server_logger
+        self.line_buffer = LineBuffer(buffer_size, overflow_policy)
+        self.max_inflight = max_inflight
+        self.writer = CommandWriter(max_pending_cmds)
+        self.scheduler = CommandScheduler(self.writer, rate=cmd_rate, plugin_rate=plugin_cmd_rate)
+        self.log_parser = LogParser(server_type)
+        self.scrollback = Scrollback(scrollback_size, self.log_parser)
+        self.startup = StartupTimeline()
+        self.sampler = ProcessSampler(self, sample_interval)
+        self.tick_probe = TickProbe(self, tick_probe_interval)
+        self.startup_report_timeout = 60
+        if restart_policy is None or not isinstance(restart_policy, RestartPolicy):
+            restart_policy = RestartPolicy(restart_policy or RestartMode.never)
+        self.restart_policy = restart_policy
         
         self._loader = server_loader
-        self._lock = Lock()
-        self._buf: Queue[str] = Queue()
-        self._passed_buf: Queue[str] = Queue()
+        self._matchers = MatcherTable()
+        self._reader: ConsoleReader = None
         self._core_tasks: Tuple[Task, ...] = None
         self._aware_tasks: Dict[int, Task] = {}
         self._event_bus = ServerEventBus(self)
+        self._startup_hooks: List[Callable[["Server", Dict[str, Any]], Awaitable[None]]] = []
+        self._stop_requested = asyncio.Event()
 
         self.running_flag = asyncio.Event()
         self.loaded_flag = asyncio.Event()
@@ -61,100 +93,110 @@ class Server(IServer):
             raise ValueError("服务端工作路径必须为绝对路径")
 
 
-    # TODO: 未来合并两个设计
-    async def _stdout_watcher(self) -> None:
-        try:
-            while True:
-                output = (await self.stdout.readline()).decode().rstrip('\n')
-                if not output:
-                    await asyncio.sleep(0.1)
-                    continue
-
-                if not self.loaded_flag.is_set() and len(re.findall('Done.', output)):
-                    self.loaded_flag.set()
-                    await self._event_bus.emit(ServerLoaded)
+    async def _on_lines(self, lines: List[ConsoleLine]) -> None:
+        self.scrollback.extend(lines)
+        if not self.loaded_flag.is_set() and self.startup.feed(lines) is not None:
+            self.loaded_flag.set()
+            asyncio.create_task(self._finish_startup())
+        # 先交给等待中的交互匹配，被消费或屏蔽的行不进入缓冲区
+        if len(self._matchers):
+            lines = [line for line in lines if self._matchers.feed(line.content)]
+        await self.line_buffer.put_many(lines)
 
-                await self._buf.put(output)
 
-                if self._lock.locked():
-                    continue
-                async with self._lock:
-                    while not self._buf.empty():
-                        output = await self._buf.get()
-                        await self._event_bus.emit(ServerOutput, EventArgs(output=output))
-        except asyncio.CancelledError:
-            pass
+    async def _finish_startup(self) -> None:
+        # detach 与 aware 的 ServerLoaded 处理器常是长期运行的循环（如定时备份），不等待；
+        # 其余处理器也可能很慢，超时后不再等待其完成
+        emit_task = asyncio.create_task(self._event_bus.emit(ServerLoaded, force_wait=True, wait_detached=False))
+        emit_task.add_done_callback(lambda _: self.startup.mark('handlers_done'))
+        await asyncio.wait((emit_task,), timeout=self.startup_report_timeout)
+        report = self.startup.report()
+        for hook in self._startup_hooks:
+            await hook(self, report)
 
 
-    async def _stderr_watcher(self) -> None:
+    async def _read_loop(self) -> None:
         try:
-            while True:
-                output = (await self.stderr.readline()).decode().rstrip('\n')
-                if not output:
-                    await asyncio.sleep(0.1)
-                    continue
-
-                if not self.loaded_flag.is_set() and len(re.findall('Done.', output)):
-                    self.loaded_flag.set()
-                    await self._event_bus.emit(ServerLoaded)
-                
-                await self._buf.put(output)
-
-                if self._lock.locked():
-                    continue
-                async with self._lock:
-                    while not self._buf.empty():
-                        output = await self._buf.get()
-                        await self._event_bus.emit(ServerOutput, EventArgs(output=output))
-        except asyncio.CancelledError:
-            pass
-
-
-    def on(self, event: Union[type, ServerEvent], func: Awaitable[None], aware: bool=False) -> None:
+            await self._reader.run()
+        finally:
+            self.line_buffer.close()
+
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            lines = await self.line_buffer.get_many()
+            if lines is None:
+                break
+            for line in lines:
+                await self._event_bus.emit(ServerOutput, line)
+            await self._event_bus.flush_batches()
+            # 处理任务积压时暂停取行，由缓冲区承担背压
+            await self._event_bus.settle(self.max_inflight)
+        await self._event_bus.flush_batches(all=True)
+
+
+    def on(self, event: Union[type, ServerEvent], func: Callable, aware: bool=False, detach: bool=False, inline: bool=False,
+           priority: int=0, chain: bool=False, policy: Union[ExecPolicy, str]=ExecPolicy.unbounded,
+           max_concurrent: int=1, max_queue: int=None, scope: Union[HandlerScope, str]=HandlerScope.permanent) -> ServerHandler:
+        # 返回处理器，调用其 remove() 即可注销；scope 为 run 时在本次运行结束（ServerStopped 分发后）自动注销，
+        # 适合在 ServerBeforeStart、ServerLoaded 等每次启动都会执行的处理器中注册
         if isinstance(event, type):
             event = event()
-        handler = ServerHandler(self.id, event, func, aware)
-        self._event_bus.register(handler)
+        handler = ServerHandler(self.id, event, func, aware, detach, inline, priority, chain,
+                                policy, max_concurrent, max_queue, scope)
+        return self._event_bus.register(handler)
 
 
     def at(self, event_class: Type[ServerEvent]) -> Future:
         return self._event_bus.register_fut(event_class)
 
 
-    def send(self, content: str) -> None:
-        self.stdin.write(f'{content}\n'.encode())
-
-
-    async def interact(self, sent_str: str, expect_pattern: str, timeout: float=None, match_reuse: bool=False, block_pattern: str=None) -> Union[Tuple[str, ...], None]:
-        async def find():
-            output = None
-            loop_flag = True
-            while loop_flag:
-                while not self._passed_buf.empty():
-                    output = await self._passed_buf.get()
-                    await self._event_bus.emit(ServerOutput, EventArgs(output=output))
-                
-                output = await self._buf.get()
-                match = re.findall(expect_pattern, output)
-                if len(match):
-                    loop_flag = False
-                    if match_reuse:
-                        await self._passed_buf.put(output)
-                    return match[0]
-                else:
-                    if block_pattern and len(re.findall(block_pattern, output)):
-                        continue
-                    await self._passed_buf.put(output)
-        
-        async with self._lock:
-            self.stdin.write(f'{sent_str}\n'.encode())
-            match_res = None
-            try:
-                match_res = await asyncio.wait_for(find(), timeout=timeout)
-            except asyncio.TimeoutError:
-                pass
-            finally:
-                return match_res
+    async def wait_for(self, event: Union[Type[ServerEvent], ServerEvent], predicate: Callable[[Any], bool]=None,
+                       timeout: float=None) -> Any:
+        # 等待下一个满足条件的事件并返回其参数，超时返回 None；
+        # 传入事件实例时先按实例过滤，如 ServerOutput(r'^(\S+) joined the game', message_only=True)
+        return await self._event_bus.wait_for(event, predicate, timeout)
+
+
+    def subscribe(self, event: Union[type, ServerEvent], maxsize: int=1000,
+                  policy: Union[OverflowPolicy, str]=OverflowPolicy.block, priority: int=0) -> Subscription:
+        if isinstance(event, type):
+            event = event()
+        return Subscription(self._event_bus, event, maxsize, policy, priority, self.id)
+
+
+    def send(self, content: str, priority: Priority=Priority.maintenance) -> bool:
+        # 返回命令是否被接受
+        if not self.scheduler.submit([content], priority):
+            self.logger.log(f"{self._reject_reason()}，已丢弃命令：{content}")
+            return False
+        return True
+
+
+    def send_many(self, contents: List[str], priority: Priority=Priority.maintenance) -> bool:
+        # 一组命令作为整体在同一次写入中连续发出，不会与其他命令交错
+        if not self.scheduler.submit(contents, priority):
+            self.logger.log(f"{self._reject_reason()}，已丢弃 {len(contents)} 条命令")
+            return False
+        return True
+
+
+    def _reject_reason(self) -> str:
+        return f"服务端 {self.id} 未运行" if not self.writer.attached else "stdin 待发送命令过多"
+
+
+    async def interact(self, sent_str: str, expect_pattern: str, timeout: float=None, match_reuse: bool=False, block_pattern: str=None,
+                       priority: Priority=Priority.maintenance) -> Union[Tuple[str, ...], None]:
+        pending = self._matchers.add(expect_pattern, block_pattern, timeout, match_reuse)
+        try:
+            if not self.send(sent_str, priority):
+                # 命令被拒绝时不会有输出，不再等待
+                return None
+            return await asyncio.wait_for(pending.future, timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._matchers.discard(pending)
 
 
     def aware_task(self, coro: Coroutine, *, name: Optional[str]=None) -> Task:
@@ -163,38 +205,114 @@ class Server(IServer):
         return t
 
 
+    @property
+    def stop_requested(self) -> bool:
+        return self._stop_requested.is_set()
+
+
     async def _run(self) -> None:
+        # 启动前已请求停止（如分批启动排队期间）则不再启动；停止请求在本次运行结束时才清除
+        try:
+            if not self._stop_requested.is_set():
+                await self._run_loop()
+        finally:
+            self._stop_requested.clear()
+            # 确保未启动的服务端也有 loaded flag，等待其加载的依赖方与 MCSR 不会一直等待
+            self.loaded_flag.set()
+
+
+    async def _run_loop(self) -> None:
+        self.restart_policy.reset()
+        while True:
+            start = time.time()
+            returncode = await self._run_once()
+            requested = self._stop_requested.is_set()
+            delay = self.restart_policy.next_delay(returncode, time.time() - start, requested)
+
+            if RestartPolicy.is_crash(returncode, requested):
+                await self._event_bus.emit(ServerCrashed, EventArgs(returncode=returncode, restart_delay=delay,
+                                                                    crash_loop=self.restart_policy.crash_loop))
+            if self.restart_policy.crash_loop:
+                self.logger.log(f"服务端 {self.id} 在 {self.restart_policy.window} 秒内重启次数过多，判定为崩溃循环，不再自动重启")
+            if delay is None:
+                return
+
+            self.logger.log(f"服务端 {self.id} 已退出（退出码 {returncode}），将在 {delay:.1f} 秒后重启")
+            try:
+                # 等待期间主动停止则放弃重启
+                await asyncio.wait_for(self._stop_requested.wait(), timeout=delay)
+                return
+            except asyncio.TimeoutError:
+                pass
+
+
+    async def _run_once(self) -> Optional[int]:
+        self.loaded_flag.clear()
+        self.startup.reset()
         await self._event_bus.emit(ServerBeforeStart, force_wait=True)
         self.proc = await self._loader.load()
+        self.startup.mark('spawn')
+        self.sampler.start(self.proc.pid)
+        self.tick_probe.start()
         self.stdin = self.proc.stdin
         self.stdout = self.proc.stdout
         self.stderr = self.proc.stderr
+        self.writer.attach(self.stdin)
+        self.scheduler.start()
+        # 重启后序号延续，回滚缓冲与订阅方看到的序号保持单调
+        start_seq = self._reader.seq if self._reader is not None else 0
+        self._reader = ConsoleReader({'stdout': self.stdout, 'stderr': self.stderr}, self._on_lines,
+                                     start_seq=start_seq, parser=self.log_parser)
+        self.line_buffer.reopen()
         self._core_tasks = tuple(map(asyncio.create_task, (
-            self._stdout_watcher(),
-            self._stderr_watcher(),
+            self._read_loop(),
+            self._dispatch_loop(),
         )))
         self.running_flag.set()
         self.stopped_flag.clear()
+        if self._stop_requested.is_set():
+            # 加载进程期间请求的停止在进程启动后补发
+            asyncio.create_task(self.stop())
 
         await self.proc.wait()
+        # 进程退出后管道随即 EOF，留出时间让读取器冲刷剩余输出、分发器取空缓冲区
+        read_task, dispatch_task = self._core_tasks
+        await asyncio.wait((read_task,), timeout=1)
+        if not read_task.done():
+            read_task.cancel()
+            self.line_buffer.close()
+        await asyncio.wait((dispatch_task,), timeout=5)
         for task in self._core_tasks:
             if not task.done():
                 task.cancel()
+        self._matchers.cancel_all()
+        self.sampler.stop()
+        self.tick_probe.stop()
+        self.scheduler.stop()
+        self.writer.detach()
         # 确保非正常结束都有 loaded flag
         self.loaded_flag.set()
         self.running_flag.clear()
         self.stopped_flag.set()
         await self._event_bus.emit(ServerStopped)
+        self._event_bus.clear_run_scoped()
         for task in self._aware_tasks.values():
             task.cancel()
+        self._aware_tasks.clear()
+        return self.proc.returncode
 
 
     async def stop(self) -> None:
+        self._stop_requested.set()
+        if not self.running_flag.is_set():
+            return
         await self._event_bus.emit(ServerBeforeStop, force_wait=True)
-        self.send('/stop')
+        self.send('/stop', Priority.admin)
         await self.stopped_flag.wait()
 
 
     async def force_stop(self) -> None:
-        self.proc.terminate()
+        self._stop_requested.set()
+        if self.proc is not None and self.proc.returncode is None:
+            self.proc.terminate()
         await self.stopped_flag.wait()
@@ -0,0 +1,64 @@
+import re
+import time
+
+from ..model.line import ConsoleLine
+from ..typing import *
+
+DONE_REGEX = re.compile(r'Done \((\d+(?:[.,]\d+)?)s\)!')
+WORLD_REGEX = re.compile(r'Preparing (?:level|start region)')
+
+STARTUP_PHASES = ('spawn', 'first_output', 'world_prepare', 'done', 'handlers_done')
+
+
+# 单次启动的阶段时间线，各阶段记录为 time.time() 时间戳
+class StartupTimeline:
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.stamps: Dict[str, Optional[float]] = {phase: None for phase in STARTUP_PHASES}
+        self.reported_seconds: Optional[float] = None
+        self.done_line: Optional[str] = None
+
+    def mark(self, phase: str, stamp: float=None) -> None:
+        if phase not in self.stamps:
+            raise ValueError(f"未知的启动阶段：{phase}")
+        if self.stamps[phase] is None:
+            self.stamps[phase] = stamp if stamp is not None else time.time()
+
+    @property
+    def finished(self) -> bool:
+        return self.stamps['done'] is not None
+
+    def feed(self, lines: List[ConsoleLine]) -> Optional[ConsoleLine]:
+        # 加载完成前逐行检查，返回 Done 行（若存在）
+        if not len(lines):
+            return None
+        stamps = self.stamps
+        if stamps['first_output'] is None:
+            stamps['first_output'] = lines[0].time
+        for line in lines:
+            content = line.content
+            if stamps['world_prepare'] is None and 'Preparing' in content and WORLD_REGEX.search(content):
+                stamps['world_prepare'] = line.time
+            if 'Done (' in content:
+                m = DONE_REGEX.search(content)
+                if m is not None:
+                    stamps['done'] = line.time
+                    self.reported_seconds = float(m.group(1).replace(',', '.'))
+                    self.done_line = content
+                    return line
+        return None
+
+    def report(self) -> Dict[str, Any]:
+        spawn = self.stamps['spawn']
+        elapsed = {
+            phase: (stamp - spawn if stamp is not None and spawn is not None else None)
+            for phase, stamp in self.stamps.items()
+        }
+        return {
+            'timestamps': dict(self.stamps),
+            'elapsed': elapsed,
+            'reported_seconds': self.reported_seconds,
+            'done_line': self.done_line,
+        }
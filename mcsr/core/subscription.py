@@ -0,0 +1,64 @@
+from ..model.event import (_EVENT_ARGS_VAR, EventBus, Event, ServerEventBus,
+                           ServerHandler, ServerOutput, SupervisorHandler)
+from ..typing import *
+from .buffer import LineBuffer, OverflowPolicy
+
+
+# 以异步迭代器形式消费事件：每个订阅有独立的有界队列，队列满时按溢出策略处理，
+# block 策略下分发会等待订阅方取走记录，背压经行缓冲区传导至读取器。
+#   async with server.subscribe(ServerOutput(r'joined the game')) as sub:
+#       async for rec in sub:
+#           ...
+# 迭代结束、被 break 或 close() 后订阅自动移除
+class Subscription:
+    def __init__(self, bus: EventBus, event: Event, maxsize: int=1000,
+                 policy: Union[OverflowPolicy, str]=OverflowPolicy.block, priority: int=0, server_id: str=None) -> None:
+        policy = OverflowPolicy(policy)
+        if policy is OverflowPolicy.coalesce and not isinstance(event, ServerOutput):
+            raise ValueError("只有 ServerOutput 订阅可以使用 coalesce 溢出策略")
+        self.event = event
+        self.buffer = LineBuffer(maxsize, policy)
+        if isinstance(bus, ServerEventBus):
+            self._handler = ServerHandler(server_id, event, self._offer, inline=True, priority=priority)
+        else:
+            self._handler = SupervisorHandler(event, self._offer, inline=True, priority=priority)
+        bus.register(self._handler)
+
+    @property
+    def closed(self) -> bool:
+        return self.buffer.closed
+
+    def stats(self) -> Dict[str, Any]:
+        return self.buffer.stats()
+
+    async def _offer(self) -> None:
+        if not self.buffer.closed:
+            await self.buffer.put_many([_EVENT_ARGS_VAR.get()])
+
+    async def get(self) -> Any:
+        # 订阅关闭且队列取空后返回 None
+        records = await self.buffer.get_many(1)
+        return records[0] if records is not None else None
+
+    def close(self) -> None:
+        if self.buffer.closed:
+            return
+        self.buffer.close()
+        self._handler.remove()
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        try:
+            while True:
+                records = await self.buffer.get_many()
+                if records is None:
+                    return
+                for record in records:
+                    yield record
+        finally:
+            self.close()
+
+    async def __aenter__(self) -> "Subscription":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.close()
@@ -6,13 +6,23 @@ import aioconsole
 from ..interface import BasicLogger, ILogger, IServer, ISupervisor
 from ..model.event import (_EVENT_ARGS_CTX, _SERVER_CTX, EventArgs,
                            MCSR_AllLoaded, MCSR_AllStopped, MCSR_ExtsLoaded,
-                           MCSR_Output, MCSR_Stderr, MCSR_Stdin, MCSR_Stdout,
+                           MCSR_Output, MCSR_Stderr, MCSR_Stdin,
+                           MCSR_StartupReport, MCSR_Stdout,
                            ServerEventBus, ServerHandler, ServerHandlerMaker,
                            Singleton, SupervisorEvent, SupervisorEventBus,
                            SupervisorHandler, SupervisorHandlerMaker)
+from ..model.instrument import HandlerMonitor
+from ..model.runner import ExecPolicy
 from ..typing import *
+from ..utils.metrics import MetricsRegistry
 from ..utils.tools import PathUtils
+from .buffer import OverflowPolicy
+from .exporter import MetricsExporter, core_metrics
+from .orchestrator import StartupOrchestrator
+from .restart import RestartMode, RestartPolicy
+from .scheduler import Priority
 from .server import Server, ServerLoader
+from .subscription import Subscription
 
 
 class MCSupervisor(ISupervisor, Singleton):
@@ -26,6 +36,16 @@ class MCSupervisor(ISupervisor, Singleton):
         self._self_handlers: List[SupervisorHandler] = []
         self._self_handlerMaker = SupervisorHandlerMaker(self)
         self._self_bus = SupervisorEventBus(self)
+        self.orchestrator = StartupOrchestrator()
+        self.monitor = HandlerMonitor(logger=self.logger)
+        self.monitor_enabled = True
+        self._self_bus.set_monitor(self.monitor)
+        # 中心指标注册表，插件可经 MCSR.metrics 注册自己的指标
+        self.metrics = MetricsRegistry()
+        self.metrics.add_collector(lambda: core_metrics(self))
+        self._exporter: Optional[MetricsExporter] = None
+        # 已请求停止 MCSR，分批启动中尚在排队的服务端不再启动
+        self._stopping = False
 
 
     @property
@@ -33,14 +53,69 @@ class MCSupervisor(ISupervisor, Singleton):
         return list(self.servers.keys())
 
 
-    def add_server(self, id: str, java_path: str, server_jar_path: str, args: Union[str, List[str]]='', no_gui: bool=True, work_path: str=None, world_name: str='world', custom_logger: ILogger=None) -> None:
+    def add_server(self, id: str, java_path: str, server_jar_path: str, args: Union[str, List[str]]='', no_gui: bool=True, work_path: str=None, world_name: str='world', custom_logger: ILogger=None,
+                   buffer_size: int=10000, overflow_policy: Union[OverflowPolicy, str]=OverflowPolicy.block, max_inflight: int=1000,
+                   scrollback_size: int=5000, server_type: str='auto', max_pending_cmds: int=10000,
+                   cmd_rate: float=None, plugin_cmd_rate: float=None, sample_interval: Optional[float]=1.0,
+                   tick_probe_interval: Optional[float]=None, restart_policy: Union[RestartPolicy, RestartMode, str]=None,
+                   depends_on: List[str]=None) -> None:
         self.servers[id] = Server(
             id=id, 
             server_loader=ServerLoader(java_path, server_jar_path, args, no_gui, work_path), 
             server_logger=custom_logger if custom_logger else BasicLogger(id), 
-            world_name=world_name
+            world_name=world_name,
+            buffer_size=buffer_size,
+            overflow_policy=overflow_policy,
+            max_inflight=max_inflight,
+            scrollback_size=scrollback_size,
+            server_type=server_type,
+            max_pending_cmds=max_pending_cmds,
+            cmd_rate=cmd_rate,
+            plugin_cmd_rate=plugin_cmd_rate,
+            sample_interval=sample_interval,
+            tick_probe_interval=tick_probe_interval,
+            restart_policy=restart_policy
         )
         self._server_buses[id] = self.servers[id]._event_bus
+        if self.monitor_enabled:
+            self._server_buses[id].set_monitor(self.monitor)
+        if depends_on:
+            self.orchestrator.depends[id] = list(depends_on)
+        self.servers[id]._startup_hooks.append(self._report_startup)
+
+
+    async def _report_startup(self, server: Server, report: Dict[str, Any]) -> None:
+        await self._self_bus.emit(MCSR_StartupReport, EventArgs(server_id=server.id, report=report))
+
+
+    def set_startup(self, max_concurrent: int=None, wait_loaded: bool=None, stagger: float=None) -> None:
+        # max_concurrent：同时处于启动阶段（已启动、尚未加载完成或退出）的服务端上限；
+        # wait_loaded：上一个服务端加载完成后才启动下一个，即逐个启动；stagger：相邻两次启动至少间隔的秒数
+        self.orchestrator.configure(max_concurrent, wait_loaded, stagger)
+
+
+    def set_monitor(self, enabled: bool=None, slow_threshold: float=None, warn_interval: float=None) -> None:
+        # enabled：是否统计处理器调用，关闭后处理器不再经过任何统计代码；
+        # slow_threshold：处理器单步阻塞事件循环超过该秒数时输出警告；warn_interval：同一处理器警告的最小间隔秒数
+        if slow_threshold is not None:
+            self.monitor.slow_threshold = slow_threshold
+        if warn_interval is not None:
+            self.monitor.warn_interval = warn_interval
+        if enabled is not None and enabled != self.monitor_enabled:
+            self.monitor_enabled = enabled
+            for bus in (self._self_bus, *self._server_buses.values()):
+                bus.set_monitor(self.monitor if enabled else None)
+
+
+    def serve_metrics(self, port: int=9108, host: str='127.0.0.1') -> MetricsExporter:
+        # 在 run() 之前调用，MCSR 启动后在 http://host:port/metrics 以 Prometheus 文本格式提供指标
+        self._exporter = MetricsExporter(self.metrics, host, port, self.logger)
+        return self._exporter
+
+
+    def handler_stats(self) -> Dict[str, Dict[str, Any]]:
+        # 按处理器名称汇总所有服务端的调用统计，监控关闭期间不再更新
+        return self.monitor.stats()
 
 
     def load_extension(self, ext_path: str) -> None:
@@ -59,15 +134,44 @@ class MCSupervisor(ISupervisor, Singleton):
         return maker
 
 
-    def register(self, event: Union[type, SupervisorEvent], aware: bool=False) -> Callable:
-        return self._self_handlerMaker.register(event, aware)
+    def register(self, event: Union[type, SupervisorEvent], aware: bool=False, detach: bool=False, inline: bool=False,
+                 priority: int=0, chain: bool=False, policy: Union[ExecPolicy, str]=ExecPolicy.unbounded,
+                 max_concurrent: int=1, max_queue: int=None) -> Callable:
+        return self._self_handlerMaker.register(event, aware, detach, inline, priority, chain, policy, max_concurrent, max_queue)
 
 
-    def on(self, event: Union[type, SupervisorEvent], func: Awaitable[None], aware: bool=False) -> None:
+    def on(self, event: Union[type, SupervisorEvent], func: Callable, aware: bool=False, detach: bool=False, inline: bool=False,
+           priority: int=0, chain: bool=False, policy: Union[ExecPolicy, str]=ExecPolicy.unbounded,
+           max_concurrent: int=1, max_queue: int=None) -> SupervisorHandler:
         if isinstance(event, type):
             event = event()
-        handler = SupervisorHandler(event, func, aware)
-        self._self_bus.register(handler)
+        handler = SupervisorHandler(event, func, aware, detach, inline, priority, chain, policy, max_concurrent, max_queue)
+        return self._self_bus.register(handler)
+
+
+    def remove_handlers(self, plugin: str) -> int:
+        # 注销某个插件（模块名）注册的所有处理器，包括尚未注册到总线的，返回注销的处理器数
+        removed = {}
+        for handler in self._self_handlers + self._server_handlers:
+            if handler.plugin == plugin and not handler.removed:
+                removed[handler] = None
+        for bus in (self._self_bus, *self._server_buses.values()):
+            removed.update(dict.fromkeys(bus._plugins.get(plugin, ())))
+        for handler in removed:
+            handler.remove()
+        return len(removed)
+
+
+    def subscribe(self, event: Union[type, SupervisorEvent], maxsize: int=1000,
+                  policy: Union[OverflowPolicy, str]=OverflowPolicy.block, priority: int=0) -> Subscription:
+        if isinstance(event, type):
+            event = event()
+        return Subscription(self._self_bus, event, maxsize, policy, priority)
+
+
+    async def wait_for(self, event: Union[Type[SupervisorEvent], SupervisorEvent], predicate: Callable[[Any], bool]=None,
+                       timeout: float=None) -> Any:
+        return await self._self_bus.wait_for(event, predicate, timeout)
 
     
     async def stdout(self, msg: str, custom_prefix: str=None) -> None:
@@ -82,11 +186,11 @@ class MCSupervisor(ISupervisor, Singleton):
         await self._self_bus.emit(MCSR_Output, EventArgs(output=msg))
 
 
-    def broadcast(self, msg: str, exclude_self: bool=False) -> None:
+    def broadcast(self, msg: str, exclude_self: bool=False, priority: Priority=Priority.maintenance) -> None:
         for server in self.servers.values():
             if server.id == _SERVER_CTX.id and exclude_self:
                 continue
-            server.send(msg)
+            server.send(msg, priority)
 
 
     def get_server(self, id: str) -> IServer:
@@ -100,9 +204,12 @@ class MCSupervisor(ISupervisor, Singleton):
 
     async def _run(self) -> None:
         for handler in self._self_handlers:
-            self._self_bus.register(handler)
+            if not handler.removed:
+                self._self_bus.register(handler)
 
         for handler in self._server_handlers:
+            if handler.removed:
+                continue
             if handler.server_id is None:
                 for server in self.servers.values():
                     server._event_bus.register(handler)
@@ -112,24 +219,32 @@ class MCSupervisor(ISupervisor, Singleton):
                 raise ValueError("不存在的服务器 id ")
             else:
                 server._event_bus.register(handler)
+        if self._exporter is not None:
+            try:
+                await self._exporter.start()
+            except OSError as e:
+                self.logger.log(f"指标服务启动失败：{e}")
         await self._self_bus.emit(MCSR_ExtsLoaded)
 
-        for server in self.servers.values():
-            asyncio.create_task(server._run())
+        run_tasks = self.orchestrator.start(self.servers, lambda server: server._run(),
+                                             lambda: self._stopping)
         asyncio.create_task(self._forward_stdin())
 
         for server in self.servers.values():
             await server.loaded_flag.wait()
-        await self._self_bus.emit(MCSR_AllLoaded)
+        await self._self_bus.emit(MCSR_AllLoaded, EventArgs(timeline=self.orchestrator.report()))
 
-        for server in self.servers.values():
-            await server.stopped_flag.wait()
+        # 服务端可能被自动重启，以运行任务结束作为彻底停止的标志
+        await asyncio.wait(run_tasks)
         await self._self_bus.emit(MCSR_AllStopped, force_wait=True)
         for task in self._aware_tasks.values():
             task.cancel()
+        if self._exporter is not None:
+            await self._exporter.stop()
 
 
     async def stop(self) -> None:
+        self._stopping = True
         tasks = []
         for server in self.servers.values():
             tasks.append(asyncio.create_task(server.stop()))
@@ -0,0 +1,125 @@
+import asyncio
+from asyncio import StreamWriter, Task
+from collections import deque
+
+from ..typing import *
+
+
+class CommandWriter:
+    # 每个服务端一个写任务：合并队列中待发送的命令为一次写入，并遵循 drain 流控
+    def __init__(self, max_pending: int=10000, high_water: int=64 * 1024, encoding: str='utf-8') -> None:
+        self.max_pending = max_pending
+        self.high_water = high_water
+        self.encoding = encoding
+
+        self.commands_written = 0
+        self.commands_rejected = 0
+        self.writes = 0
+        self.bytes_written = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._latency_sum = 0.0
+
+        self._stdin: StreamWriter = None
+        self._task: Task = None
+        # 每项为 (入队时间, 命令数, 已编码的整批命令)，同一批命令总是在一次写入中连续发出
+        self._pending: Deque[Tuple[float, int, bytes]] = deque()
+        self._pending_cmds = 0
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending_cmds
+
+    @property
+    def attached(self) -> bool:
+        return self._stdin is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queue_depth': self._pending_cmds,
+            'commands_written': self.commands_written,
+            'commands_rejected': self.commands_rejected,
+            'writes': self.writes,
+            'bytes_written': self.bytes_written,
+            'last_latency': self.last_latency,
+            'avg_latency': self._latency_sum / self.writes if self.writes else 0.0,
+            'max_latency': self.max_latency,
+        }
+
+    def attach(self, stdin: StreamWriter) -> None:
+        self._stdin = stdin
+        transport = stdin.transport
+        if transport is not None:
+            transport.set_write_buffer_limits(high=self.high_water)
+        self._task = asyncio.create_task(self._write_loop())
+
+    def detach(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        self._stdin = None
+        self._pending.clear()
+        self._pending_cmds = 0
+        self._idle.set()
+
+    def submit(self, contents: List[str]) -> bool:
+        if not len(contents):
+            return True
+        if self._stdin is None:
+            # 进程未运行（包括重启等待期间）时拒绝命令，不会在下次启动后发给尚未加载完成的服务端
+            self.commands_rejected += len(contents)
+            return False
+        if self._pending_cmds + len(contents) > self.max_pending:
+            # 服务端长时间不读取 stdin 时拒绝新命令，避免内存无限增长
+            self.commands_rejected += len(contents)
+            return False
+        data = ''.join(f'{c}\n' for c in contents).encode(self.encoding)
+        self._pending.append((asyncio.get_running_loop().time(), len(contents), data))
+        self._pending_cmds += len(contents)
+        self._idle.clear()
+        self._wakeup.set()
+        return True
+
+    async def drain(self) -> None:
+        # 等待当前所有已提交的命令写出
+        await self._idle.wait()
+
+    async def _write_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                if not len(self._pending):
+                    self._idle.set()
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                oldest = self._pending[0][0]
+                chunks = []
+                cmds = 0
+                while len(self._pending):
+                    _, n, data = self._pending.popleft()
+                    chunks.append(data)
+                    cmds += n
+                payload = b''.join(chunks)
+
+                self._stdin.write(payload)
+                # 传输缓冲低于高水位时 drain 立即返回
+                await self._stdin.drain()
+
+                self._pending_cmds -= cmds
+                latency = loop.time() - oldest
+                self.last_latency = latency
+                self._latency_sum += latency
+                if latency > self.max_latency:
+                    self.max_latency = latency
+                self.writes += 1
+                self.commands_written += cmds
+                self.bytes_written += len(payload)
+        except (asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            self._idle.set()
@@ -63,9 +63,12 @@ class IServer:
         self.stopped_flag: asyncio.Event() = None
         self.cwd: str = None
         self.world_folder_name: str = None
+        self.scrollback: Any = None
 
     @abstractmethod
-    def on(self, event: type, func: Awaitable[None], aware: bool=False) -> None:
+    def on(self, event: type, func: Callable, aware: bool=False, detach: bool=False, inline: bool=False,
+           priority: int=0, chain: bool=False, policy: Any=None, max_concurrent: int=1, max_queue: int=None,
+           scope: Any=None) -> Any:
         pass
 
     @abstractmethod
@@ -73,7 +76,19 @@ class IServer:
         pass
 
     @abstractmethod
-    def send(self, content: str) -> None:
+    async def wait_for(self, event: Any, predicate: Callable[[Any], bool]=None, timeout: float=None) -> Any:
+        pass
+
+    @abstractmethod
+    def subscribe(self, event: Any, maxsize: int=1000, policy: Any=None, priority: int=0) -> Any:
+        pass
+
+    @abstractmethod
+    def send(self, content: str, priority: Any=None) -> bool:
+        pass
+
+    @abstractmethod
+    def send_many(self, contents: List[str], priority: Any=None) -> bool:
         pass
 
     @abstractmethod
@@ -1,4 +1,5 @@
 import asyncio
+import inspect
 import re
 from abc import ABC, abstractmethod
 from asyncio import Future
@@ -6,6 +7,10 @@ from contextvars import ContextVar, Token
 
 from ..interface import IServer, ISupervisor
 from ..typing import *
+from .instrument import HandlerMonitor, HandlerStats
+from .line import ConsoleLine
+from .matcher import OutputMatchIndex, compile_pattern, first_match
+from .runner import ExecPolicy, HandlerRunner, report_error
 
 
 class Singleton:
@@ -16,21 +21,63 @@ class Singleton:
 
 
 class EventArgs:
+    # 同一事件的所有处理器共享同一参数对象，创建后只读
     def __init__(self, **kwargs) -> None:
-        for k, v in kwargs.items():
-            self.__dict__[k] = v
+        self.__dict__.update(kwargs)
 
-    def add(self, **kwargs) -> None:
-        for k, v in kwargs.items():
-            self.__dict__[k] = v
+    def __setattr__(self, __name: str, __value: Any) -> None:
+        raise AttributeError("事件参数只读，不能修改")
+
+
+class MatchView:
+    # 单个处理器的匹配结果，其余字段直接读取共享的事件参数，不做复制
+    __slots__ = ('_args', 'matched')
+
+    def __init__(self, args: Any, matched: Union[str, Tuple[str, ...]]) -> None:
+        self._args = args
+        self.matched = matched
+
+    def __getattr__(self, __name: str) -> Any:
+        return getattr(self._args, __name)
+
+
+_NO_ARGS = EventArgs()
 
-    def remove(self, *args) -> None:
-        for k in args:
-            self.__dict__.pop(k)
+
+def _read_time(args: Any) -> Optional[float]:
+    # 服务端输出事件参数中最早一行的读取时间，其他事件返回 None
+    cls = type(args)
+    if cls is ConsoleLine:
+        return args.time
+    if cls is MatchView:
+        return _read_time(args._args)
+    if cls is EventArgs:
+        lines = args.__dict__.get('lines')
+        if lines:
+            return _read_time(lines[0])
+    return None
 
 
 _EVENT_ARGS_VAR = ContextVar("_EVENT_ARGS_VAR")
 _SERVER_VAR = ContextVar("_SERVER_VAR")
+# 当前处理器所属的插件（模块名），用于按插件限流等
+_PLUGIN_VAR: ContextVar[Optional[str]] = ContextVar("_PLUGIN_VAR")
+
+
+class _ChainState:
+    __slots__ = ('consumed',)
+
+    def __init__(self) -> None:
+        self.consumed = False
+_CHAIN_VAR: ContextVar[Optional[_ChainState]] = ContextVar("_CHAIN_VAR", default=None)
+
+
+def consume() -> None:
+    # 在 chain 处理器中调用，本次事件不再分发给优先级更低的处理器
+    state = _CHAIN_VAR.get()
+    if state is None:
+        raise RuntimeError("只有 chain 模式的处理器可以消费事件")
+    state.consumed = True
 
 
 class EventArgsLocal(Singleton):
@@ -39,7 +86,7 @@ class EventArgsLocal(Singleton):
         self.__storage__: ContextVar[Event]
 
     def __setattr__(self, __name: str, __value: Any) -> None:
-        setattr(self.__storage__.get(), __name, __value)
+        raise AttributeError("事件参数只读，不能修改")
 
     def __getattr__(self, __name: str) -> Any:
         return getattr(self.__storage__.get(), __name)
@@ -81,54 +128,149 @@ _SERVER_CTX = ServerVarLocal()
 _SERVER_CTX: IServer
 
 
+class HandlerScope(Enum):
+    # 一直有效，直到显式调用 remove()
+    permanent = 'permanent'
+    # 只在服务端本次运行期间有效，ServerStopped 分发后自动移除
+    run = 'run'
+
+
 class Handler(ABC):
-    def __init__(self, event: "Event", method: Awaitable[None]) -> None:
+    def __init__(self, event: "Event", method: Callable, aware: bool=False, detach: bool=False, inline: bool=False,
+                 priority: int=0, chain: bool=False, policy: Union[ExecPolicy, str]=ExecPolicy.unbounded,
+                 max_concurrent: int=1, max_queue: int=None) -> None:
         super().__init__()
         self._method = method
+        self._aware = aware
         self.event = event
+        self.plugin: Optional[str] = getattr(method, '__module__', None)
+        # 带异步 __call__ 的对象同样视为异步处理器；返回可等待对象的普通函数（如 lambda: foo()）在调用时识别
+        self.is_async = asyncio.iscoroutinefunction(method) or \
+            (not inspect.isroutine(method) and asyncio.iscoroutinefunction(getattr(method, '__call__', None)))
+        # 数值越小越先执行，同优先级按注册顺序
+        self.priority = priority
+        # chain 处理器在分发处按顺序执行完毕后才继续分发，可调用 consume() 使后续处理器不再执行
+        self.chain = chain
+        # 同步函数总是在分发处直接调用；异步处理器默认在事件的分发任务中依次执行，
+        # inline 的异步处理器在分发处直接等待，detach 与 aware 的处理器各自创建任务
+        self.detach = self.is_async and (detach or aware) and not chain
+        self.inline = not self.is_async or chain or (inline and not self.detach)
+        # 非 unbounded 的执行策略由执行器排队调度，同步与 chain 处理器就地执行，不受策略影响。
+        # 每个事件总线（即每个服务端）为处理器创建各自的执行器
+        self.policy = ExecPolicy(policy)
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queued = self.policy is not ExecPolicy.unbounded and self.is_async and not chain
+        self.scope = HandlerScope.permanent
+        self.removed = False
+        # 已注册到的事件总线；未指定服务端的处理器会注册到所有服务端
+        self._buses: Dict["EventBus", None] = {}
+        # 所在总线设置了监控时的调用统计
+        self.stats: Optional[HandlerStats] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.plugin}.{getattr(self._method, '__qualname__', repr(self._method))}"
+
+    def remove(self) -> None:
+        # 从所有已注册的事件总线移除；尚未注册（如 MCSR 启动前）的处理器之后也不再注册
+        self.removed = True
+        for bus in tuple(self._buses.keys()):
+            bus.unregister(self)
 
     @abstractmethod
-    async def handle(self, *args) -> None:
+    def _enter(self, owner: Any, args: EventArgs) -> Tuple[Token, ...]:
         pass
 
+    @abstractmethod
+    def _exit(self, tokens: Tuple[Token, ...]) -> None:
+        pass
+
+    def call(self, owner: Any, args: EventArgs=None) -> None:
+        tokens = self._enter(owner, args)
+        try:
+            if self.stats is None:
+                res = self._method()
+            else:
+                res = self.stats.call(self, self._method, _read_time(args))
+            if inspect.isawaitable(res):
+                # 同步调用处无法等待，在当前上下文中创建任务执行，不能丢弃
+                self._track(owner, asyncio.ensure_future(res))
+        finally:
+            self._exit(tokens)
+
+    async def handle(self, owner: Any, args: EventArgs=None) -> None:
+        tokens = self._enter(owner, args)
+        try:
+            if self.stats is not None:
+                if self.is_async:
+                    await self.stats.run(self, self._method(), _read_time(args))
+                else:
+                    res = self.stats.call(self, self._method, _read_time(args))
+                    if inspect.isawaitable(res):
+                        await res
+            elif self.is_async:
+                await self._method()
+            else:
+                res = self._method()
+                if inspect.isawaitable(res):
+                    await res
+        finally:
+            self._exit(tokens)
+
+    def spawn(self, owner: Any, args: EventArgs=None) -> asyncio.Task:
+        # 新任务在创建时复制当前上下文，创建后即可恢复
+        tokens = self._enter(owner, args)
+        try:
+            if self.stats is None:
+                t = asyncio.create_task(self._method())
+            else:
+                t = asyncio.create_task(self.stats.run_task(self, self._method(), _read_time(args)))
+        finally:
+            self._exit(tokens)
+        self._track(owner, t)
+        return t
+
+    def _track(self, owner: Any, t: asyncio.Future) -> None:
+        if self._aware:
+            owner._aware_tasks[id(t)] = t
+            t.add_done_callback(lambda t: owner._aware_tasks.pop(id(t), None))
+
 
 class ServerHandler(Handler):
-    def __init__(self, server_id: Optional[str], event: "ServerEvent", method: Awaitable[None], aware: bool=False) -> None:
-        super().__init__(event, method)
+    def __init__(self, server_id: Optional[str], event: "ServerEvent", method: Callable, aware: bool=False,
+                 detach: bool=False, inline: bool=False, priority: int=0, chain: bool=False,
+                 policy: Union[ExecPolicy, str]=ExecPolicy.unbounded, max_concurrent: int=1, max_queue: int=None,
+                 scope: Union[HandlerScope, str]=HandlerScope.permanent) -> None:
+        super().__init__(event, method, aware, detach, inline, priority, chain, policy, max_concurrent, max_queue)
         self.event: ServerEvent
         self.server_id = server_id
-        self._aware = aware
+        self.scope = HandlerScope(scope)
 
-    async def handle(self, server: IServer, args: EventArgs=None) -> None:
-        try:
-            args_token = _EVENT_ARGS_CTX._add_ctx(args)
-            server_token = _SERVER_CTX._add_ctx(server)
-            t = asyncio.create_task(self._method())
-            if self._aware:
-                server._aware_tasks[id(t)] = t
-            await t
-        finally:
-            server._aware_tasks.pop(id(t), None)
-            _SERVER_CTX._del_ctx(server_token)
-            _EVENT_ARGS_CTX._del_ctx(args_token)
+    def _enter(self, server: IServer, args: EventArgs) -> Tuple[Token, ...]:
+        return _EVENT_ARGS_CTX._add_ctx(args), _SERVER_CTX._add_ctx(server), _PLUGIN_VAR.set(self.plugin)
+
+    def _exit(self, tokens: Tuple[Token, ...]) -> None:
+        args_token, server_token, plugin_token = tokens
+        _PLUGIN_VAR.reset(plugin_token)
+        _SERVER_CTX._del_ctx(server_token)
+        _EVENT_ARGS_CTX._del_ctx(args_token)
 
 
 class SupervisorHandler(Handler):
-    def __init__(self, event: "SupervisorEvent", method: Awaitable[None], aware: bool=False) -> None:
-        super().__init__(event, method)
+    def __init__(self, event: "SupervisorEvent", method: Callable, aware: bool=False,
+                 detach: bool=False, inline: bool=False, priority: int=0, chain: bool=False,
+                 policy: Union[ExecPolicy, str]=ExecPolicy.unbounded, max_concurrent: int=1, max_queue: int=None) -> None:
+        super().__init__(event, method, aware, detach, inline, priority, chain, policy, max_concurrent, max_queue)
         self.event: SupervisorEvent
-        self._aware = aware
 
-    async def handle(self, supervisor: ISupervisor, args: EventArgs=None) -> None:
-        try:
-            args_token = _EVENT_ARGS_CTX._add_ctx(args)
-            t = asyncio.create_task(self._method())
-            if self._aware:
-                supervisor._aware_tasks[id(t)] = t
-            await t
-        finally:
-            supervisor._aware_tasks.pop(id(t), None)
-            _EVENT_ARGS_CTX._del_ctx(args_token)
+    def _enter(self, supervisor: ISupervisor, args: EventArgs) -> Tuple[Token, ...]:
+        return _EVENT_ARGS_CTX._add_ctx(args), _PLUGIN_VAR.set(self.plugin)
+
+    def _exit(self, tokens: Tuple[Token, ...]) -> None:
+        args_token, plugin_token = tokens
+        _PLUGIN_VAR.reset(plugin_token)
+        _EVENT_ARGS_CTX._del_ctx(args_token)
 
 
 class ServerHandlerMaker:
@@ -136,12 +278,17 @@ class ServerHandlerMaker:
         self.server_id = server_id
         self.supervisor_ref = supervisor_ref
     
-    def register(self, event: Union[type, "ServerEvent"], aware: bool=False) -> Callable:
+    def register(self, event: Union[type, "ServerEvent"], aware: bool=False, detach: bool=False, inline: bool=False,
+                 priority: int=0, chain: bool=False, policy: Union[ExecPolicy, str]=ExecPolicy.unbounded,
+                 max_concurrent: int=1, max_queue: int=None) -> Callable:
         if isinstance(event, type):
             event = event()
-        def func(cb: Callable) -> None:
-            handler = ServerHandler(self.server_id, event, cb, aware)
+        # 装饰后的名字绑定为处理器本身，可调用 remove() 注销
+        def func(cb: Callable) -> ServerHandler:
+            handler = ServerHandler(self.server_id, event, cb, aware, detach, inline, priority, chain,
+                                    policy, max_concurrent, max_queue)
             self.supervisor_ref._server_handlers.append(handler)
+            return handler
         return func
 
 
@@ -149,12 +296,17 @@ class SupervisorHandlerMaker:
     def __init__(self, supervisor_ref: ISupervisor) -> None:
         self.supervisor_ref = supervisor_ref
     
-    def register(self, event: Union[type, "SupervisorEvent"], aware: bool=False) -> Callable:
+    def register(self, event: Union[type, "SupervisorEvent"], aware: bool=False, detach: bool=False, inline: bool=False,
+                 priority: int=0, chain: bool=False, policy: Union[ExecPolicy, str]=ExecPolicy.unbounded,
+                 max_concurrent: int=1, max_queue: int=None) -> Callable:
         if isinstance(event, type):
             event = event()
-        def func(cb: Callable) -> None:
-            handler = SupervisorHandler(event, cb, aware)
+        # 装饰后的名字绑定为处理器本身，可调用 remove() 注销
+        def func(cb: Callable) -> SupervisorHandler:
+            handler = SupervisorHandler(event, cb, aware, detach, inline, priority, chain,
+                                        policy, max_concurrent, max_queue)
             self.supervisor_ref._self_handlers.append(handler)
+            return handler
         return func
 
 
@@ -165,10 +317,10 @@ class Event(ABC):
     @property
     def type(self) -> str:
         return self.__class__.__name__
-    
-    @abstractmethod
-    def make_coroutine(self, handler: Handler, args: EventArgs=None) -> Coroutine:
-        return handler.handle(args)
+
+    def bind(self, args: EventArgs) -> Optional[EventArgs]:
+        # 返回交给处理器的参数，返回 None 表示处理器不响应本次事件
+        return args
 
 
 ######################################################
@@ -178,9 +330,6 @@ class ServerEvent(Event):
     def __init__(self) -> None:
         super().__init__()
 
-    def make_coroutine(self, server: IServer, handler: ServerHandler, args: EventArgs=None) -> Coroutine:
-        return handler.handle(server, args)
-
 
 class ServerBeforeStart(ServerEvent):
     def __init__(self) -> None:
@@ -193,20 +342,38 @@ class ServerLoaded(ServerEvent):
 
 
 class ServerOutput(ServerEvent):
-    def __init__(self, match: re.Pattern=None) -> None:
+    def __init__(self, match: re.Pattern=None, level: Union[str, Tuple[str, ...]]=None, thread: str=None, message_only: bool=False,
+                 batch: bool=False, max_lines: int=None, max_delay: float=None) -> None:
         super().__init__()
         self.pattern = match
-
-    def make_coroutine(self, server: IServer, handler: ServerHandler, args: EventArgs = None) -> Coroutine:
-        async def func():
-            if self.pattern is None:
-                await handler.handle(server, args)
-            else:
-                matched = re.findall(self.pattern, args.output)
-                if len(matched):
-                    args.add(matched=matched[0])
-                    await handler.handle(server, args)
-        return func()
+        self.regex = compile_pattern(match) if match is not None else None
+        self.levels = (level,) if isinstance(level, str) else level
+        self.thread = thread
+        # 为 True 时模式只匹配日志行的消息部分，而非整行
+        self.field = 'message' if message_only else 'content'
+        # 批量模式下处理器经 eargs.lines 一次收到多行记录：未设置 max_delay 时每批读取到的输出冲刷一次，
+        # 否则在首行到达 max_delay 秒后冲刷；积累满 max_lines 行时立即冲刷
+        self.batch = batch
+        self.max_lines = max_lines
+        self.max_delay = max_delay
+
+    def accepts(self, line: ConsoleLine) -> bool:
+        if self.levels is not None and line.level not in self.levels:
+            return False
+        if self.thread is not None and line.thread != self.thread:
+            return False
+        return True
+
+    def bind(self, args: EventArgs) -> Union[EventArgs, MatchView, None]:
+        line = args.line
+        if not self.accepts(line):
+            return None
+        if self.regex is None:
+            return args
+        matched = first_match(self.regex, getattr(line, self.field))
+        if matched is None:
+            return None
+        return MatchView(args, matched)
 
 
 class ServerBeforeStop(ServerEvent):
@@ -219,6 +386,21 @@ class ServerStopped(ServerEvent):
         super().__init__()
 
 
+class ServerCrashed(ServerEvent):
+    def __init__(self) -> None:
+        super().__init__()
+
+
+class ServerMetrics(ServerEvent):
+    def __init__(self) -> None:
+        super().__init__()
+
+
+class ServerTickAlert(ServerEvent):
+    def __init__(self) -> None:
+        super().__init__()
+
+
 ######################################################
 
 
@@ -226,9 +408,6 @@ class SupervisorEvent(Event):
     def __init__(self) -> None:
         super().__init__()
 
-    def make_coroutine(self, supervisor: ISupervisor, handler: SupervisorHandler, args: EventArgs=None) -> Coroutine:
-        return handler.handle(supervisor, args)
-
 
 class MCSR_Stdin(SupervisorEvent):
     def __init__(self) -> None:
@@ -250,16 +429,13 @@ class MCSR_Stdout(SupervisorEvent):
         super().__init__()
         self.pattern = match
 
-    def make_coroutine(self, supervisor: ISupervisor, handler: SupervisorHandler, args: EventArgs=None) -> Coroutine:
-        async def func():
-            if self.pattern is None:
-                await handler.handle(supervisor, args)
-            else:
-                matched = re.findall(self.pattern, args.output)
-                if len(matched):
-                    args.add(matched=matched[0])
-                    await handler.handle(supervisor, args)
-        return func()
+    def bind(self, args: EventArgs) -> Union[EventArgs, MatchView, None]:
+        if self.pattern is None:
+            return args
+        matched = re.findall(self.pattern, args.output)
+        if not len(matched):
+            return None
+        return MatchView(args, matched[0])
 
 
 class MCSR_Stderr(SupervisorEvent):
@@ -267,16 +443,13 @@ class MCSR_Stderr(SupervisorEvent):
         super().__init__()
         self.pattern = match
 
-    def make_coroutine(self, supervisor: ISupervisor, handler: SupervisorHandler, args: EventArgs=None) -> Coroutine:
-        async def func():
-            if self.pattern is None:
-                await handler.handle(supervisor, args)
-            else:
-                matched = re.findall(self.pattern, args.output)
-                if len(matched):
-                    args.add(matched=matched[0])
-                    await handler.handle(supervisor, args)
-        return func()
+    def bind(self, args: EventArgs) -> Union[EventArgs, MatchView, None]:
+        if self.pattern is None:
+            return args
+        matched = re.findall(self.pattern, args.output)
+        if not len(matched):
+            return None
+        return MatchView(args, matched[0])
 
 
 class MCSR_Output(SupervisorEvent):
@@ -284,16 +457,13 @@ class MCSR_Output(SupervisorEvent):
         super().__init__()
         self.pattern = match
 
-    def make_coroutine(self, supervisor: ISupervisor, handler: SupervisorHandler, args: EventArgs=None) -> Coroutine:
-        async def func():
-            if self.pattern is None:
-                await handler.handle(supervisor, args)
-            else:
-                matched = re.findall(self.pattern, args.output)
-                if len(matched):
-                    args.add(matched=matched[0])
-                    await handler.handle(supervisor, args)
-        return func()
+    def bind(self, args: EventArgs) -> Union[EventArgs, MatchView, None]:
+        if self.pattern is None:
+            return args
+        matched = re.findall(self.pattern, args.output)
+        if not len(matched):
+            return None
+        return MatchView(args, matched[0])
 
 
 class MCSR_AllStopped(SupervisorEvent):
@@ -301,108 +471,450 @@ class MCSR_AllStopped(SupervisorEvent):
         super().__init__()
 
 
+class MCSR_StartupReport(SupervisorEvent):
+    def __init__(self) -> None:
+        super().__init__()
+
+
 ######################################################
 
 
+class Waiter:
+    __slots__ = ('event_class', 'event', 'predicate', 'future')
+
+    def __init__(self, event_class: Type["Event"], event: Optional["Event"], predicate: Optional[Callable[[Any], bool]],
+                 future: Future) -> None:
+        self.event_class = event_class
+        # event 为 None 时不做事件自身的过滤，否则先经 event.bind 过滤并得到参数
+        self.event = event
+        self.predicate = predicate
+        self.future = future
+
+
 class EventBus(ABC):
     def __init__(self) -> None:
         super().__init__()
-        self.handler_map: Dict[str, List[Handler]] = {}
-        self.fut_map: Dict[str, List[Future]] = {}
-        
-        self._lock = asyncio.Lock()
+        # 以事件类本身为键，订阅基类的处理器也会收到所有子类事件；
+        # 值以字典作有序集合，注册与移除均为 O(1)
+        self.handler_map: Dict[Type[Event], Dict[Handler, None]] = {}
+        # 按事件类索引的等待者，没有等待者时 emit 不做额外工作
+        self.waiters: Dict[Type[Event], List[Waiter]] = {}
+
+        # 处理器 -> (优先级, 注册序号)，决定分发顺序
+        self._rank: Dict[Handler, Tuple[int, int]] = {}
+        self._next_order = 0
+        # 事件类 -> 按优先级与注册顺序合并其 MRO 上所有处理器的分发表，
+        # 注册与移除时只失效受影响的事件类，下次分发该事件时重建
+        self._dispatch_table: Dict[type, Tuple[Handler, ...]] = {}
+        # 插件（模块名）-> 该插件的处理器，用于按插件整体注销
+        self._plugins: Dict[Optional[str], Dict[Handler, None]] = {}
+        self._runners: Dict[Handler, HandlerRunner] = {}
+        self.monitor: Optional[HandlerMonitor] = None
+
+    def add_waiter(self, event: Union[Type[Event], "Event"], predicate: Callable[[Any], bool]=None) -> Waiter:
+        if isinstance(event, type):
+            event_class, event = event, None
+        else:
+            event_class = type(event)
+        waiter = Waiter(event_class, event, predicate, asyncio.get_running_loop().create_future())
+        if self.waiters.get(event_class) is None:
+            self.waiters[event_class] = []
+        self.waiters[event_class].append(waiter)
+        return waiter
+
+    def remove_waiter(self, waiter: Waiter) -> None:
+        waiters = self.waiters.get(waiter.event_class)
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        if not len(waiters):
+            del self.waiters[waiter.event_class]
 
-    @abstractmethod
     def register_fut(self, event_class: Type[Event]) -> Future:
-        if self.fut_map.get(event_class.__name__) is None:
-            self.fut_map[event_class.__name__] = []
-        fut = Future()
-        self.fut_map[event_class.__name__].append(fut)
-        return fut
+        return self.add_waiter(event_class).future
+
+    async def wait_for(self, event: Union[Type[Event], "Event"], predicate: Callable[[Any], bool]=None,
+                       timeout: float=None) -> Any:
+        # 返回首个满足条件的事件参数，超时返回 None
+        waiter = self.add_waiter(event, predicate)
+        try:
+            return await asyncio.wait_for(waiter.future, timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.remove_waiter(waiter)
 
     @abstractmethod
-    def register(self, handler: Handler) -> None:
-        event = handler.event
-        if self.handler_map.get(event.type) is None:
-            self.handler_map[event.type] = []
-        self.handler_map[event.type].append(handler)
+    def register(self, handler: Handler) -> Handler:
+        if handler in self._rank:
+            return handler
+        event_class = type(handler.event)
+        handlers = self.handler_map.get(event_class)
+        if handlers is None:
+            handlers = self.handler_map[event_class] = {}
+        handlers[handler] = None
+        handler.removed = False
+        self._rank[handler] = (handler.priority, self._next_order)
+        self._next_order += 1
+        plugin_handlers = self._plugins.get(handler.plugin)
+        if plugin_handlers is None:
+            plugin_handlers = self._plugins[handler.plugin] = {}
+        plugin_handlers[handler] = None
+        handler._buses[self] = None
+        if handler.queued:
+            self._runners[handler] = HandlerRunner(handler, handler.policy, handler.max_concurrent, handler.max_queue)
+        if self.monitor is not None:
+            handler.stats = self.monitor.stats_for(handler)
+        self._invalidate(event_class)
+        return handler
+
+    def unregister(self, handler: Handler) -> bool:
+        if self._rank.pop(handler, None) is None:
+            return False
+        event_class = type(handler.event)
+        handlers = self.handler_map[event_class]
+        del handlers[handler]
+        if not len(handlers):
+            del self.handler_map[event_class]
+        plugin_handlers = self._plugins[handler.plugin]
+        del plugin_handlers[handler]
+        if not len(plugin_handlers):
+            del self._plugins[handler.plugin]
+        handler._buses.pop(self, None)
+        # 从总线移除的处理器，其执行器中排队的调用不再执行
+        runner = self._runners.pop(handler, None)
+        if runner is not None:
+            runner.discard()
+        self._invalidate(event_class)
+        return True
+
+    def set_monitor(self, monitor: Optional[HandlerMonitor]) -> None:
+        # 设为 None 关闭监控，处理器恢复无统计的调用路径
+        self.monitor = monitor
+        for handler in self._rank.keys():
+            handler.stats = monitor.stats_for(handler) if monitor is not None else None
+
+    def unregister_plugin(self, plugin: Optional[str]) -> int:
+        handlers = self._plugins.get(plugin)
+        if handlers is None:
+            return 0
+        handlers = tuple(handlers.keys())
+        for handler in handlers:
+            self.unregister(handler)
+        return len(handlers)
+
+    def _invalidate(self, event_class: type) -> None:
+        # 只有订阅类自身及其子类的分发表包含该处理器
+        for cls in tuple(self._dispatch_table.keys()):
+            if issubclass(cls, event_class):
+                del self._dispatch_table[cls]
+
+    def runner_stats(self) -> Dict[str, Dict[str, Any]]:
+        # 设置了执行策略的处理器的积压、并发与丢弃统计
+        return {handler.name: runner.stats() for handler, runner in self._runners.items()}
+
+    def handlers_for(self, event_class: type) -> Tuple[Handler, ...]:
+        handlers = self._dispatch_table.get(event_class)
+        if handlers is None:
+            found = []
+            for cls in event_class.__mro__:
+                found.extend(self.handler_map.get(cls, ()))
+            found.sort(key=self._rank.__getitem__)
+            handlers = self._dispatch_table[event_class] = tuple(found)
+        return handlers
 
     @abstractmethod
     async def emit(self, event_type: Type[Event], args: EventArgs=None) -> None:
         pass
 
+    def _bind_all(self, handlers: Iterable[Handler], args: EventArgs) -> Iterator[Tuple[Handler, EventArgs]]:
+        rank = self._rank
+        for handler in handlers:
+            # 分发途中被前面的处理器移除的，不再调用
+            if handler not in rank:
+                continue
+            handler_args = handler.event.bind(args)
+            if handler_args is not None:
+                yield handler, handler_args
+
+    async def _run_serial(self, owner: Any, calls: List[Tuple[Handler, EventArgs]], after: Optional[asyncio.Task]=None) -> None:
+        if after is not None:
+            await after
+        for handler, args in calls:
+            try:
+                await handler.handle(owner, args)
+            except Exception as e:
+                report_error(handler, e)
+
+    async def _run_chain(self, handler: Handler, owner: Any, args: EventArgs) -> bool:
+        state = _ChainState()
+        token = _CHAIN_VAR.set(state)
+        try:
+            if handler.is_async:
+                await handler.handle(owner, args)
+            else:
+                handler.call(owner, args)
+        except Exception as e:
+            report_error(handler, e)
+        finally:
+            _CHAIN_VAR.reset(token)
+        return state.consumed
+
+    async def _dispatch(self, owner: Any, calls: Iterable[Tuple[Handler, EventArgs]], wait: bool=False,
+                        detached: bool=True) -> List[Future]:
+        # 同步与 inline 处理器就地执行，其余异步处理器合并到分发任务中依次执行，
+        # 只有 detach 与 aware 的处理器单独创建任务，设置了执行策略的处理器交给其执行器排队。
+        # 各类处理器按优先级顺序调度：之前积累的异步处理器先作为分发任务创建，不等待其执行完毕；
+        # 只有可能消费事件的 chain 处理器等待排在它之前的处理器执行完毕。
+        # detached 为 False 时返回的任务不含 detach 与 aware 处理器的任务，等待时不受长期运行的任务影响。
+        # chain 处理器消费事件后，剩余处理器既不匹配也不调度
+        tasks = []
+        serial = None
+        pending = None
+        for handler, args in calls:
+            if handler.chain:
+                if pending is not None:
+                    await pending
+                    pending = None
+                if serial is not None:
+                    await self._run_serial(owner, serial)
+                    serial = None
+                if await self._run_chain(handler, owner, args):
+                    break
+            elif handler.inline:
+                if serial is not None:
+                    pending = asyncio.create_task(self._run_serial(owner, serial, pending))
+                    tasks.append(pending)
+                    serial = None
+                try:
+                    if handler.is_async:
+                        await handler.handle(owner, args)
+                    else:
+                        handler.call(owner, args)
+                except Exception as e:
+                    report_error(handler, e)
+            elif handler.queued or handler.detach:
+                if serial is not None:
+                    pending = asyncio.create_task(self._run_serial(owner, serial, pending))
+                    tasks.append(pending)
+                    serial = None
+                if handler.queued:
+                    fut = self._runners[handler].submit(owner, args, wait and (detached or not handler.detach))
+                    if fut is not None:
+                        tasks.append(fut)
+                else:
+                    t = handler.spawn(owner, args)
+                    if detached:
+                        tasks.append(t)
+            elif serial is None:
+                serial = [(handler, args)]
+            else:
+                serial.append((handler, args))
+        if serial is not None:
+            tasks.append(asyncio.create_task(self._run_serial(owner, serial, pending)))
+        return tasks
+
+    def _wake(self, event_class: Type[Event], args: Any) -> None:
+        for cls in event_class.__mro__:
+            waiters = self.waiters.get(cls)
+            if waiters is None:
+                continue
+            remains = []
+            for waiter in waiters:
+                fut = waiter.future
+                if fut.done():
+                    continue
+                try:
+                    waiter_args = args if waiter.event is None else waiter.event.bind(args)
+                    if waiter_args is None or (waiter.predicate is not None and not waiter.predicate(waiter_args)):
+                        remains.append(waiter)
+                        continue
+                except Exception as e:
+                    fut.set_exception(e)
+                    continue
+                fut.set_result(waiter_args)
+            if len(remains):
+                self.waiters[cls] = remains
+            else:
+                del self.waiters[cls]
+
+
+class _Batch:
+    __slots__ = ('lines', 'timer')
+
+    def __init__(self) -> None:
+        self.lines: List[Any] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+# 订阅这些类（ServerOutput 的基类）的处理器同样会收到 ServerOutput
+_OUTPUT_BASES = tuple(cls for cls in ServerOutput.__mro__[1:] if issubclass(cls, Event))
+
 
 class ServerEventBus(EventBus):
     def __init__(self, server_ref: IServer) -> None:
         super().__init__()
-        self.handler_map: Dict[str, List[ServerHandler]]
+        self.handler_map: Dict[Type[ServerEvent], List[ServerHandler]]
         self.server_ref = server_ref
+        self._output_index = OutputMatchIndex()
+        self._extra: Optional[Tuple[ServerHandler, ...]] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self._batches: Dict[ServerHandler, _Batch] = {}
+        # 随服务端本次运行结束而移除的处理器
+        self._run_scoped: Dict[ServerHandler, None] = {}
+
+    def register(self, handler: ServerHandler) -> ServerHandler:
+        if handler in self._rank:
+            return handler
+        super().register(handler)
+        if isinstance(handler.event, ServerOutput):
+            self._output_index.add(handler, handler.event.regex, handler.event.field, self._rank[handler])
+        elif type(handler.event) in _OUTPUT_BASES:
+            self._extra = None
+        if handler.scope is HandlerScope.run:
+            self._run_scoped[handler] = None
+        return handler
+
+    def unregister(self, handler: ServerHandler) -> bool:
+        if not super().unregister(handler):
+            return False
+        if isinstance(handler.event, ServerOutput):
+            self._output_index.remove(handler)
+            self._take(handler)
+        elif type(handler.event) in _OUTPUT_BASES:
+            self._extra = None
+        self._run_scoped.pop(handler, None)
+        return True
+
+    def clear_run_scoped(self) -> int:
+        # 服务端停止后调用，移除本次运行期间注册的 run 作用域处理器
+        handlers = tuple(self._run_scoped.keys())
+        for handler in handlers:
+            handler.remove()
+        return len(handlers)
+
+    def _output_extra(self) -> Tuple[ServerHandler, ...]:
+        # 订阅 ServerOutput 基类（如 ServerEvent）的处理器不在匹配索引中，单独缓存
+        if self._extra is None:
+            self._extra = tuple(h for h in self.handlers_for(ServerOutput) if not isinstance(h.event, ServerOutput))
+        return self._extra
+
+    def _output_calls(self, line: ConsoleLine) -> Iterator[Tuple[ServerHandler, Any]]:
+        # 单次扫描匹配索引，只有真正匹配的处理器参与分发；行对象直接作为共享参数
+        matches = self._output_index.match(line)
+        extra = self._output_extra()
+        if len(extra):
+            matches.extend((handler, None) for handler in extra)
+            matches.sort(key=lambda item: self._rank[item[0]])
+        rank = self._rank
+        for handler, matched in matches:
+            if handler not in rank:
+                continue
+            event = handler.event
+            if isinstance(event, ServerOutput):
+                if not event.accepts(line):
+                    continue
+                if event.batch:
+                    full = self._collect(handler, line if matched is None else MatchView(line, matched))
+                    if full is not None:
+                        yield handler, full
+                    continue
+            yield handler, (line if matched is None else MatchView(line, matched))
+
+    def _collect(self, handler: ServerHandler, record: Any) -> Optional[EventArgs]:
+        # 将记录加入批量处理器的缓冲，满 max_lines 行时返回待派发的批次
+        batch = self._batches.get(handler)
+        if batch is None:
+            batch = self._batches[handler] = _Batch()
+        batch.lines.append(record)
+        event: ServerOutput = handler.event
+        if event.max_lines is not None and len(batch.lines) >= event.max_lines:
+            return self._take(handler)
+        if event.max_delay is not None and batch.timer is None:
+            batch.timer = asyncio.get_running_loop().call_later(event.max_delay, self._on_batch_timer, handler)
+        return None
+
+    def _take(self, handler: ServerHandler) -> Optional[EventArgs]:
+        batch = self._batches.pop(handler, None)
+        if batch is None:
+            return None
+        if batch.timer is not None:
+            batch.timer.cancel()
+        return EventArgs(lines=batch.lines)
+
+    def _on_batch_timer(self, handler: ServerHandler) -> None:
+        args = self._take(handler)
+        if args is not None:
+            asyncio.create_task(self._deliver(((handler, args),)))
+
+    async def _deliver(self, calls: Iterable[Tuple[ServerHandler, Any]]) -> List[Future]:
+        # 执行器中排队的调用同样计入进行中的数量，积压时由 settle() 反压读取，而不是在执行器中无限堆积
+        tasks = await self._dispatch(self.server_ref, calls, True)
+        for t in tasks:
+            self._inflight.add(t)
+            t.add_done_callback(self._inflight.discard)
+        return tasks
+
+    async def flush_batches(self, all: bool=False) -> None:
+        # 派发按读取批次冲刷的批量处理器，all 为 True 时按时延冲刷的批次也立即派发
+        if not len(self._batches):
+            return
+        calls = []
+        for handler in tuple(self._batches.keys()):
+            if all or handler.event.max_delay is None:
+                calls.append((handler, self._take(handler)))
+        if len(calls):
+            calls.sort(key=lambda item: self._rank[item[0]])
+            await self._deliver(calls)
 
-    def register_fut(self, event_class: Type[ServerEvent]) -> Future:
-        super().register_fut(event_class)
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
 
-    def register(self, handler: ServerHandler) -> None:
-        super().register(handler)
+    async def settle(self, limit: int) -> None:
+        # 等待进行中（含执行器中排队）的输出处理调用数降到上限以下
+        while len(self._inflight) >= limit:
+            await asyncio.wait(tuple(self._inflight), return_when=asyncio.FIRST_COMPLETED)
 
-    async def emit(self, event_class: Type[ServerEvent], args: EventArgs=None, force_wait: bool=False) -> None:
+    async def emit(self, event_class: Type[ServerEvent], args: Union[EventArgs, ConsoleLine]=None, force_wait: bool=False,
+                   wait_detached: bool=True) -> None:
+        # wait_detached 为 False 时 force_wait 只等待非 detach、非 aware 的处理器
         if args is None:
-            args = EventArgs()
+            args = _NO_ARGS
 
-        handlers = self.handler_map.get(event_class.__name__)
-        if handlers is None:
-            return
-        else:
-            tasks = []
-            for handler in handlers:
-                event = handler.event
-                t = asyncio.create_task(event.make_coroutine(self.server_ref, handler, args))
-                tasks.append(t)
-            if force_wait:
+        if event_class is ServerOutput:
+            tasks = await self._deliver(self._output_calls(args))
+            if force_wait and len(tasks):
                 await asyncio.wait(tasks)
+        else:
+            handlers = self.handlers_for(event_class)
+            if len(handlers):
+                tasks = await self._dispatch(self.server_ref, self._bind_all(handlers, args), force_wait, wait_detached)
+                if force_wait and len(tasks):
+                    await asyncio.wait(tasks)
 
-        async with self._lock:
-            futs = self.fut_map.get(event_class.__name__)
-            if futs is None:
-                return
-            else:
-                for fut in futs:
-                    fut.set_result(True)
-                self.fut_map[event_class.__name__].clear()
+        if len(self.waiters):
+            self._wake(event_class, args)
 
 
 class SupervisorEventBus(EventBus):
     def __init__(self, supervisor_ref: ISupervisor) -> None:
         super().__init__()
-        self.handler_map: Dict[str, List[SupervisorHandler]]
+        self.handler_map: Dict[Type[SupervisorEvent], List[SupervisorHandler]]
         self.supervisor_ref = supervisor_ref
 
-    def register_fut(self, event_class: Type[SupervisorEvent]) -> Future:
-        super().register_fut(event_class)
-
-    def register(self, handler: SupervisorHandler) -> None:
-        super().register(handler)
+    def register(self, handler: SupervisorHandler) -> SupervisorHandler:
+        return super().register(handler)
 
     async def emit(self, event_class: Type[SupervisorEvent], args: EventArgs=None, force_wait: bool=False) -> None:
         if args is None:
-            args = EventArgs()
+            args = _NO_ARGS
         
-        handlers = self.handler_map.get(event_class.__name__)
-        if handlers is None:
-            return
-        else:
-            tasks = []
-            for handler in handlers:
-                event = handler.event
-                t = asyncio.create_task(event.make_coroutine(self.supervisor_ref, handler, args))
-                tasks.append(t)
-            if force_wait:
+        handlers = self.handlers_for(event_class)
+        if len(handlers):
+            tasks = await self._dispatch(self.supervisor_ref, self._bind_all(handlers, args), force_wait)
+            if force_wait and len(tasks):
                 await asyncio.wait(tasks)
 
-        async with self._lock:
-            futs = self.fut_map.get(event_class.__name__)
-            if futs is None:
-                return
-            else:
-                for fut in futs:
-                    fut.set_result(True)
-                self.fut_map[event_class.__name__].clear()
+        if len(self.waiters):
+            self._wake(event_class, args)
@@ -0,0 +1,153 @@
+import time
+from time import perf_counter
+
+from ..interface import BasicLogger, ILogger
+from ..typing import *
+from ..utils.histogram import Histogram
+
+
+# 在原协程外逐步驱动并计时每一步，即每次恢复执行到下一次挂起之间独占事件循环的时间。
+# 以可等待对象而非协程函数实现，少一层协程帧
+class _Timed:
+    __slots__ = ('stats', 'handler', 'coro', 'read_time')
+
+    def __init__(self, stats: "HandlerStats", handler: Any, coro: Coroutine, read_time: Optional[float]) -> None:
+        self.stats = stats
+        self.handler = handler
+        self.coro = coro
+        self.read_time = read_time
+
+    def __await__(self) -> Any:
+        stats = self.stats
+        stats.calls += 1
+        stats.inflight += 1
+        if stats.inflight > stats.max_inflight:
+            stats.max_inflight = stats.inflight
+        if self.read_time is not None:
+            stats.line_delay.observe(time.time() - self.read_time)
+        coro = self.coro
+        threshold = stats.monitor.slow_threshold
+        value = exc = None
+        start = step = perf_counter()
+        try:
+            while True:
+                try:
+                    yielded = coro.send(value) if exc is None else coro.throw(exc)
+                except StopIteration as e:
+                    return e.value
+                except Exception as e:
+                    stats._error(e)
+                    raise
+                finally:
+                    now = perf_counter()
+                    if now - step > stats.max_block or now - step >= threshold:
+                        stats.blocked(self.handler, now - step)
+                try:
+                    value = yield yielded
+                    exc = None
+                except BaseException as e:
+                    value = None
+                    exc = e
+                step = perf_counter()
+        finally:
+            stats.inflight -= 1
+            stats.latency.observe(perf_counter() - start)
+
+
+# 单个处理器（按名称合并所有服务端与每次重新注册）的调用统计
+class HandlerStats:
+    __slots__ = ('monitor', 'calls', 'errors', 'last_error', 'inflight', 'max_inflight', 'slow_calls',
+                 'max_block', 'latency', 'line_delay', '_warned_at')
+
+    def __init__(self, monitor: "HandlerMonitor") -> None:
+        self.monitor = monitor
+        self.calls = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.inflight = 0
+        self.max_inflight = 0
+        # 单步阻塞超过阈值的次数与最长的一次阻塞
+        self.slow_calls = 0
+        self.max_block = 0.0
+        # 开始执行到结束的总耗时（含等待）
+        self.latency = Histogram()
+        # 输出行被读取到处理器开始执行的时间，只对服务端输出事件记录
+        self.line_delay = Histogram()
+        self._warned_at = 0.0
+
+    def blocked(self, handler: Any, duration: float) -> None:
+        if duration > self.max_block:
+            self.max_block = duration
+        if duration >= self.monitor.slow_threshold:
+            self.slow_calls += 1
+            self.monitor.warn(handler, self, duration)
+
+    def _error(self, e: Exception) -> None:
+        self.errors += 1
+        self.last_error = repr(e)
+
+    def call(self, handler: Any, method: Callable, read_time: Optional[float]) -> Any:
+        # 同步处理器在分发处执行完毕，总耗时即阻塞时间
+        self.calls += 1
+        if read_time is not None:
+            self.line_delay.observe(time.time() - read_time)
+        begin = perf_counter()
+        try:
+            return method()
+        except Exception as e:
+            self._error(e)
+            raise
+        finally:
+            elapsed = perf_counter() - begin
+            self.latency.observe(elapsed)
+            if elapsed > self.max_block or elapsed >= self.monitor.slow_threshold:
+                self.blocked(handler, elapsed)
+
+    def run(self, handler: Any, coro: Coroutine, read_time: Optional[float]) -> Awaitable[None]:
+        return _Timed(self, handler, coro, read_time)
+
+    async def run_task(self, handler: Any, coro: Coroutine, read_time: Optional[float]) -> None:
+        # 创建任务需要协程对象
+        await _Timed(self, handler, coro, read_time)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'inflight': self.inflight,
+            'max_inflight': self.max_inflight,
+            'slow_calls': self.slow_calls,
+            'max_block': self.max_block,
+            'latency': self.latency.as_dict(),
+            'line_delay': self.line_delay.as_dict(),
+        }
+
+
+# 事件处理器监控：统计每个处理器的调用次数、耗时分布、进行中数量、异常，
+# 以及输出行读取到处理器开始执行的延迟；处理器单步阻塞事件循环超过 slow_threshold 秒时输出警告。
+# 未设置监控的总线上处理器的 stats 为 None，调用路径只多一次属性判断
+class HandlerMonitor:
+    def __init__(self, slow_threshold: float=0.1, logger: ILogger=None, warn_interval: float=10) -> None:
+        self.slow_threshold = slow_threshold
+        self.logger = logger if logger is not None else BasicLogger('MCSR')
+        # 同一处理器两次慢调用警告的最小间隔（秒），避免刷屏
+        self.warn_interval = warn_interval
+        self.handlers: Dict[str, HandlerStats] = {}
+
+    def stats_for(self, handler: Any) -> HandlerStats:
+        stats = self.handlers.get(handler.name)
+        if stats is None:
+            stats = self.handlers[handler.name] = HandlerStats(self)
+        return stats
+
+    def warn(self, handler: Any, stats: HandlerStats, duration: float) -> None:
+        now = time.monotonic()
+        if now - stats._warned_at < self.warn_interval:
+            return
+        stats._warned_at = now
+        self.logger.log(f"事件处理器 {handler.name} 阻塞事件循环 {duration * 1000:.1f} ms"
+                        f"（阈值 {self.slow_threshold * 1000:.0f} ms，累计 {stats.slow_calls} 次）")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stats.as_dict() for name, stats in self.handlers.items()}
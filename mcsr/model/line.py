@@ -0,0 +1,118 @@
+import re
+
+from ..typing import *
+
+
+class LogLayout:
+    __slots__ = ('name', 'regex')
+
+    def __init__(self, name: str, pattern: str) -> None:
+        self.name = name
+        self.regex = re.compile(pattern)
+
+
+_VANILLA = LogLayout('vanilla', r'^\[(?P<time>\d{2}:\d{2}:\d{2})\] \[(?P<thread>[^\]]+?)/(?P<level>[A-Z]+)\]: (?P<message>.*)$')
+_FABRIC = LogLayout('fabric', r'^\[(?P<time>\d{2}:\d{2}:\d{2})\] \[(?P<thread>[^\]]+?)/(?P<level>[A-Z]+)\] \((?P<logger>[^)]*)\) (?P<message>.*)$')
+_FORGE = LogLayout('forge', r'^\[(?P<time>[^\]]+)\] \[(?P<thread>[^\]]+?)/(?P<level>[A-Z]+)\] \[(?P<logger>[^\]]*?)/?\]: (?P<message>.*)$')
+_PAPER = LogLayout('paper', r'^\[(?P<time>\d{2}:\d{2}:\d{2}) (?P<level>[A-Z]+)\]: (?P<message>.*)$')
+
+LOG_LAYOUTS: Dict[str, LogLayout] = {
+    'vanilla': _VANILLA,
+    'fabric': _FABRIC,
+    'forge': _FORGE,
+    # NeoForge 沿用 Forge 的日志格式
+    'neoforge': LogLayout('neoforge', _FORGE.regex.pattern),
+    'paper': _PAPER,
+}
+# 自动检测时的尝试顺序，格式越具体越靠前
+_DETECT_ORDER = (_FORGE, _FABRIC, _VANILLA, _PAPER)
+
+_EMPTY_FIELDS = (None, None, None, None, None)
+
+
+class LogParser:
+    def __init__(self, server_type: str='auto') -> None:
+        if server_type != 'auto' and server_type not in LOG_LAYOUTS:
+            raise ValueError(f"不支持的服务端类型：{server_type}")
+        self.server_type = server_type
+        self.layout: Optional[LogLayout] = LOG_LAYOUTS.get(server_type)
+
+    def parse(self, content: str) -> Tuple[Optional[str], ...]:
+        # 返回 (time, thread, level, logger, message)，无法识别的行各字段为 None
+        if self.layout is None:
+            for layout in _DETECT_ORDER:
+                m = layout.regex.match(content)
+                if m is not None:
+                    # 首次识别成功后锁定该格式
+                    self.layout = layout
+                    break
+            else:
+                return _EMPTY_FIELDS
+        else:
+            m = self.layout.regex.match(content)
+            if m is None:
+                return _EMPTY_FIELDS
+
+        d = m.groupdict()
+        return (d['time'], d.get('thread'), d['level'], d.get('logger'), d['message'])
+
+
+class ConsoleLine:
+    __slots__ = ('seq', 'stream', 'content', 'time', '_parser', '_fields')
+
+    def __init__(self, seq: int, stream: str, content: str, time: float, parser: LogParser=None) -> None:
+        self.seq = seq
+        self.stream = stream
+        self.content = content
+        self.time = time
+        self._parser = parser
+        self._fields: Optional[Tuple[Optional[str], ...]] = None
+
+    def _parse(self) -> Tuple[Optional[str], ...]:
+        if self._fields is None:
+            self._fields = self._parser.parse(self.content) if self._parser is not None else _EMPTY_FIELDS
+        return self._fields
+
+    # 作为 ServerOutput 事件参数时，所有处理器共享同一行对象，以下为事件参数的通用字段
+    @property
+    def output(self) -> str:
+        return self.content
+
+    @property
+    def timestamp(self) -> float:
+        return self.time
+
+    @property
+    def line(self) -> "ConsoleLine":
+        return self
+
+    @property
+    def parsed(self) -> bool:
+        return self._parse() is not _EMPTY_FIELDS
+
+    @property
+    def log_time(self) -> Optional[str]:
+        return self._parse()[0]
+
+    @property
+    def thread(self) -> Optional[str]:
+        return self._parse()[1]
+
+    @property
+    def level(self) -> Optional[str]:
+        return self._parse()[2]
+
+    @property
+    def logger(self) -> Optional[str]:
+        return self._parse()[3]
+
+    @property
+    def message(self) -> str:
+        msg = self._parse()[4]
+        return msg if msg is not None else self.content
+
+    def __str__(self) -> str:
+        return self.content
+
+    def __repr__(self) -> str:
+        return f"ConsoleLine(seq={self.seq}, stream={self.stream!r}, content={self.content!r})"
@@ -0,0 +1,170 @@
+import re
+
+try:
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+from ..typing import *
+
+
+def compile_pattern(pattern: Union[str, re.Pattern]) -> re.Pattern:
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    return re.compile(pattern)
+
+
+def first_match(regex: re.Pattern, text: str) -> Union[str, Tuple[str, ...], None]:
+    # 与 re.findall(pattern, text)[0] 的返回值保持一致
+    m = regex.search(text)
+    if m is None:
+        return None
+    groups = regex.groups
+    if groups == 0:
+        return m.group(0)
+    elif groups == 1:
+        res = m.group(1)
+        return res if res is not None else ''
+    else:
+        return tuple(g if g is not None else '' for g in m.groups())
+
+
+def _literal_runs(parsed: Any, runs: List[str]) -> None:
+    buf = []
+    for op, av in parsed:
+        if op is sre_constants.LITERAL:
+            buf.append(chr(av))
+            continue
+        if len(buf):
+            runs.append(''.join(buf))
+            buf = []
+        if op is sre_constants.SUBPATTERN:
+            # 分组内容同样是必需的，但与两侧不连续
+            if not av[1] & re.IGNORECASE:
+                _literal_runs(av[-1], runs)
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+            _literal_runs(av[2], runs)
+    if len(buf):
+        runs.append(''.join(buf))
+
+
+def required_literal(regex: re.Pattern) -> Optional[str]:
+    # 提取匹配成功时文本中必然出现的最长字面量，用于廉价的子串预筛
+    if regex.flags & (re.IGNORECASE | re.VERBOSE) or not isinstance(regex.pattern, str):
+        return None
+    try:
+        parsed = sre_parse.parse(regex.pattern, regex.flags)
+    except Exception:
+        return None
+    runs: List[str] = []
+    _literal_runs(parsed, runs)
+    if not len(runs):
+        return None
+    return max(runs, key=len)
+
+
+class _PatternGroup:
+    __slots__ = ('key', 'regex', 'field', 'literal', 'keys')
+
+    def __init__(self, key: Tuple[Any, int, str], regex: re.Pattern, field: str, literal: Optional[str]) -> None:
+        self.key = key
+        self.regex = regex
+        self.field = field
+        self.literal = literal
+        # 以字典作有序集合，移除为 O(1)
+        self.keys: Dict[Any, None] = {}
+
+
+# 文本模式的多路匹配索引：注册时编译并按必需字面量分组，
+# 匹配时每个不同的模式对每行至多执行一次正则搜索。
+# 注册与移除只增量更新所属分组，不重建整个索引。
+# field 指定匹配记录的哪个文本属性（如整行 content 或仅消息部分 message）
+class OutputMatchIndex:
+    def __init__(self) -> None:
+        self._entries: Dict[Any, Tuple[Any, Optional[_PatternGroup]]] = {}
+        self._counter = 0
+        self._unfiltered: Dict[Any, None] = {}
+        self._groups: Dict[Tuple[Any, int, str], _PatternGroup] = {}
+        self._by_literal: Dict[Tuple[str, str], Dict[Tuple[Any, int, str], _PatternGroup]] = {}
+        self._no_literal: Dict[Tuple[Any, int, str], _PatternGroup] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, key: Any, pattern: Union[str, re.Pattern, None], field: str='content', order: Any=None) -> None:
+        # order 为匹配结果的排序键，默认按注册顺序
+        if key in self._entries:
+            self.remove(key)
+        self._counter += 1
+        if order is None:
+            order = self._counter
+        if pattern is None:
+            self._unfiltered[key] = None
+            self._entries[key] = (order, None)
+            return
+
+        regex = compile_pattern(pattern)
+        group_key = (regex.pattern, regex.flags, field)
+        group = self._groups.get(group_key)
+        if group is None:
+            # 同一模式只在首次注册时提取必需字面量
+            literal = required_literal(regex)
+            group = self._groups[group_key] = _PatternGroup(group_key, regex, field, literal)
+            if literal:
+                self._by_literal.setdefault((field, literal), {})[group_key] = group
+            else:
+                self._no_literal[group_key] = group
+        group.keys[key] = None
+        self._entries[key] = (order, group)
+
+    def remove(self, key: Any) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        group = entry[1]
+        if group is None:
+            del self._unfiltered[key]
+            return True
+        del group.keys[key]
+        if not len(group.keys):
+            del self._groups[group.key]
+            if group.literal:
+                bucket = self._by_literal[(group.field, group.literal)]
+                del bucket[group.key]
+                if not len(bucket):
+                    del self._by_literal[(group.field, group.literal)]
+            else:
+                del self._no_literal[group.key]
+        return True
+
+    def match(self, record: Any) -> List[Tuple[Any, Any]]:
+        res = [(key, None) for key in self._unfiltered]
+        texts: Dict[str, str] = {}
+        for (field, literal), groups in self._by_literal.items():
+            text = texts.get(field)
+            if text is None:
+                text = texts[field] = getattr(record, field)
+            if literal not in text:
+                continue
+            for group in groups.values():
+                self._match_group(group, text, res)
+        for group in self._no_literal.values():
+            text = texts.get(group.field)
+            if text is None:
+                text = texts[group.field] = getattr(record, group.field)
+            self._match_group(group, text, res)
+
+        if len(res) > 1:
+            entries = self._entries
+            res.sort(key=lambda item: entries[item[0]][0])
+        return res
+
+    @staticmethod
+    def _match_group(group: _PatternGroup, text: str, res: List[Tuple[Any, Any]]) -> None:
+        matched = first_match(group.regex, text)
+        if matched is None:
+            return
+        for key in group.keys:
+            res.append((key, matched))
@@ -0,0 +1,102 @@
+import asyncio
+from asyncio import Future
+from collections import deque
+
+from ..typing import *
+
+
+class ExecPolicy(Enum):
+    # 不限制同一处理器的并发调用，按 inline/detach 等分发方式执行
+    unbounded = 'unbounded'
+    # 同一处理器一次只执行一个调用，按事件顺序依次执行
+    serial = 'serial'
+    # 同一处理器至多同时执行 max_concurrent 个调用，其余排队
+    bounded = 'bounded'
+    # 只保留最新的一个待执行调用，排队中的旧调用被丢弃
+    latest = 'latest'
+
+
+def report_error(handler: Any, e: Exception) -> None:
+    # 与未被获取的任务异常一样交给事件循环的异常处理器，不影响同一事件的其他处理器
+    asyncio.get_running_loop().call_exception_handler({
+        'message': f"事件处理器 {handler.name} 执行出错",
+        'exception': e,
+    })
+
+
+# 按执行策略调度单个处理器在一个事件总线上的调用：排队、限制并发并统计积压与丢弃。
+# 处理器注册到多个服务端时每个服务端各有一个执行器，限制分别生效，一个服务端停止不影响其他服务端排队的调用
+class HandlerRunner:
+    def __init__(self, handler: Any, policy: ExecPolicy, max_concurrent: int=1, max_queue: int=None) -> None:
+        self.handler = handler
+        self.policy = policy
+        self.max_concurrent = max(1, max_concurrent) if policy is ExecPolicy.bounded else 1
+        # 积压超过 max_queue 时丢弃最旧的待执行调用
+        self.max_queue = 1 if policy is ExecPolicy.latest else max_queue
+        self.active = 0
+        self.completed = 0
+        self.dropped = 0
+        self.high_watermark = 0
+
+        self._queue: Deque[Tuple[Any, Any, Optional[Future]]] = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'policy': self.policy.value,
+            'max_concurrent': self.max_concurrent,
+            'active': self.active,
+            'queue_depth': len(self._queue),
+            'high_watermark': self.high_watermark,
+            'completed': self.completed,
+            'dropped': self.dropped,
+        }
+
+    def submit(self, owner: Any, args: Any, wait: bool=False) -> Optional[Future]:
+        # wait 为 True 时返回在本次调用结束（或被丢弃）时完成的 future
+        fut = asyncio.get_running_loop().create_future() if wait else None
+        if self.max_queue is not None and len(self._queue) >= self.max_queue:
+            self._drop(self._queue.popleft())
+        self._queue.append((owner, args, fut))
+        if len(self._queue) > self.high_watermark:
+            self.high_watermark = len(self._queue)
+        if self.active < self.max_concurrent:
+            self.active += 1
+            t = asyncio.create_task(self._work())
+            if self.handler._aware:
+                owner._aware_tasks[id(t)] = t
+                t.add_done_callback(lambda t: owner._aware_tasks.pop(id(t), None))
+        return fut
+
+    def discard(self) -> None:
+        # 丢弃所有排队中的调用，正在执行的调用不受影响
+        while len(self._queue):
+            self._drop(self._queue.popleft())
+
+    def _drop(self, item: Tuple[Any, Any, Optional[Future]]) -> None:
+        self.dropped += 1
+        fut = item[2]
+        if fut is not None and not fut.done():
+            fut.set_result(None)
+
+    async def _work(self) -> None:
+        try:
+            while len(self._queue):
+                owner, args, fut = self._queue.popleft()
+                try:
+                    await self.handler.handle(owner, args)
+                except Exception as e:
+                    report_error(self.handler, e)
+                finally:
+                    if fut is not None and not fut.done():
+                        fut.set_result(None)
+                self.completed += 1
+        except asyncio.CancelledError:
+            # aware 处理器随服务端停止被取消时，积压的调用一并丢弃
+            self.discard()
+            raise
+        finally:
+            self.active -= 1
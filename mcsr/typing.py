@@ -1,3 +1,3 @@
-from typing import (Any, Awaitable, Callable, Coroutine, Dict, List, Optional,
-                    Tuple, Union, Type, Literal)
+from typing import (Any, AsyncIterator, Awaitable, Callable, Coroutine, Deque, Dict, Iterable,
+                    Iterator, List, Optional, Set, Tuple, Union, Type, Literal)
 from enum import Enum
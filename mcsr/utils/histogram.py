@@ -0,0 +1,57 @@
+from bisect import bisect_left
+
+from ..typing import *
+
+# 单位为秒，覆盖 0.1 ms 到 10 s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# 固定分桶直方图：记录一次观测只是一次二分查找、计数与累加，内存占用与观测次数无关。
+# 第 i 个桶统计 (bounds[i-1], bounds[i]] 内的观测，最后一个桶统计超过最大上界的观测
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds: Tuple[float, ...]=LATENCY_BUCKETS) -> None:
+        if not len(bounds) or any(a >= b for a, b in zip(bounds, bounds[1:])):
+            raise ValueError("直方图分桶上界必须非空且严格递增")
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        # (上界, 不超过该上界的观测数)，最后一项上界为 inf
+        res = []
+        total = 0
+        for bound, n in zip(self.bounds + (float('inf'),), self.counts):
+            total += n
+            res.append((bound, total))
+        return res
+
+    def quantile(self, q: float) -> Optional[float]:
+        # 返回分位数所在桶的上界，落在最后一个桶时返回 inf
+        count = self.count
+        if not count:
+            return None
+        rank = q * count
+        total = 0
+        for bound, n in zip(self.bounds + (float('inf'),), self.counts):
+            total += n
+            if total >= rank and n:
+                return bound
+        return float('inf')
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+        }
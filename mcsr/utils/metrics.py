@@ -0,0 +1,266 @@
+import math
+import re
+from abc import ABC, abstractmethod
+
+from ..typing import *
+from .histogram import LATENCY_BUCKETS, Histogram
+
+_NAME_RE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*$')
+_LABEL_RE = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*$')
+
+
+def _check_name(name: str) -> None:
+    if not _NAME_RE.match(name):
+        raise ValueError(f"不合法的指标名：{name}")
+
+
+def _check_labels(labelnames: Tuple[str, ...]) -> None:
+    for label in labelnames:
+        if not _LABEL_RE.match(label) or label.startswith('__') or label == 'le':
+            raise ValueError(f"不合法的标签名：{label}")
+
+
+def _escape_help(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not len(labels):
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label(v)}"' for k, v in labels.items()) + '}'
+
+
+# 一个指标族在某次采集时的全部样本，由注册的指标或采集函数生成。
+# type 为 counter、gauge 或 histogram；histogram 的样本是分桶直方图
+class MetricFamily:
+    def __init__(self, name: str, type: str, help: str='') -> None:
+        _check_name(name)
+        if type not in ('counter', 'gauge', 'histogram'):
+            raise ValueError(f"不支持的指标类型：{type}")
+        self.name = name
+        self.type = type
+        self.help = help
+        self.samples: List[Tuple[Dict[str, Any], Union[float, Histogram]]] = []
+
+    def add(self, value: Union[float, Histogram], **labels: Any) -> "MetricFamily":
+        if (self.type == 'histogram') != isinstance(value, Histogram):
+            raise TypeError(f"指标 {self.name} 的样本类型与指标类型 {self.type} 不符")
+        self.samples.append((labels, value))
+        return self
+
+    def render(self, out: List[str]) -> None:
+        out.append(f'# HELP {self.name} {_escape_help(self.help)}')
+        out.append(f'# TYPE {self.name} {self.type}')
+        for labels, value in self.samples:
+            if self.type != 'histogram':
+                out.append(f'{self.name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            total = 0
+            for bound, total in value.cumulative():
+                bucket_labels = dict(labels, le=_format_value(float(bound)))
+                out.append(f'{self.name}_bucket{_format_labels(bucket_labels)} {total}')
+            out.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(value.sum)}')
+            out.append(f'{self.name}_count{_format_labels(labels)} {total}')
+
+
+class _CounterValue:
+    __slots__ = ('value',)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float=1) -> None:
+        if amount < 0:
+            raise ValueError("计数器只能增加")
+        self.value += amount
+
+
+class _GaugeValue:
+    __slots__ = ('value',)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float=1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float=1) -> None:
+        self.value -= amount
+
+
+class Metric(ABC):
+    type = ''
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...]=()) -> None:
+        _check_name(name)
+        _check_labels(labelnames)
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        # 无标签的指标在注册后立即以 0 输出
+        if not len(self.labelnames):
+            self._children[()] = self._new_child()
+
+    @abstractmethod
+    def _new_child(self) -> Any:
+        pass
+
+    def labels(self, *values: Any, **kwargs: Any) -> Any:
+        # 按标签值取得（或创建）对应的时间序列
+        if len(kwargs):
+            if len(values) or set(kwargs.keys()) != set(self.labelnames):
+                raise ValueError(f"指标 {self.name} 的标签为 {self.labelnames}")
+            values = tuple(kwargs[k] for k in self.labelnames)
+        elif len(values) != len(self.labelnames):
+            raise ValueError(f"指标 {self.name} 的标签为 {self.labelnames}")
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def remove(self, *values: Any) -> None:
+        self._children.pop(tuple(str(v) for v in values), None)
+
+    def _default(self) -> Any:
+        if len(self.labelnames):
+            raise ValueError(f"指标 {self.name} 带有标签，需先调用 labels()")
+        return self.labels()
+
+    def _value(self, child: Any) -> Union[float, Histogram]:
+        return child.value
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, self.type, self.help)
+        for key, child in self._children.items():
+            family.add(self._value(child), **dict(zip(self.labelnames, key)))
+        return family
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def _new_child(self) -> _CounterValue:
+        return _CounterValue()
+
+    def inc(self, amount: float=1) -> None:
+        self._default().inc(amount)
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def _new_child(self) -> _GaugeValue:
+        return _GaugeValue()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float=1) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float=1) -> None:
+        self._default().dec(amount)
+
+
+class HistogramMetric(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...]=(),
+                 buckets: Tuple[float, ...]=LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self) -> Histogram:
+        return Histogram(self.buckets)
+
+    def _value(self, child: Histogram) -> Histogram:
+        return child
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+
+# 中心指标注册表：核心模块与插件注册计数器、仪表与直方图，或注册在采集时即时读取状态的采集函数，
+# 由 render() 输出 Prometheus 文本格式。
+# 同名同类型同标签的重复注册返回已有指标，插件在每次启动时注册也不会出错
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+        self.collector_errors = 0
+
+    def _register(self, metric: Metric) -> Any:
+        exists = self._metrics.get(metric.name)
+        if exists is not None:
+            if type(exists) is not type(metric) or exists.labelnames != metric.labelnames:
+                raise ValueError(f"指标 {metric.name} 已以不同的类型或标签注册")
+            return exists
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...]=()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Tuple[str, ...]=()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...]=(),
+                  buckets: Tuple[float, ...]=LATENCY_BUCKETS) -> HistogramMetric:
+        return self._register(HistogramMetric(name, help, labels, buckets))
+
+    def unregister(self, name: str) -> bool:
+        return self._metrics.pop(name, None) is not None
+
+    def add_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        # 采集函数在每次抓取时于事件循环中调用，应只读取内存中的状态
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def remove_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    def collect(self) -> List[MetricFamily]:
+        families = [metric.collect() for metric in self._metrics.values()]
+        for collector in tuple(self._collectors):
+            try:
+                families.extend(list(collector()))
+            except Exception:
+                # 单个采集函数出错不影响其余指标的输出
+                self.collector_errors += 1
+        families.append(MetricFamily('mcsr_metrics_collector_errors_total', 'counter',
+                                     '指标采集函数出错的次数').add(self.collector_errors))
+        return families
+
+    def render(self) -> str:
+        out: List[str] = []
+        seen: Set[str] = set()
+        for family in self.collect():
+            # 同名指标族只输出第一个，避免生成无法解析的重复 TYPE 行
+            if family.name in seen:
+                continue
+            seen.add(family.name)
+            family.render(out)
+        out.append('')
+        return '\n'.join(out)
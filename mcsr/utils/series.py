@@ -0,0 +1,64 @@
+import time
+from array import array
+
+from ..typing import *
+
+
+# 定长环形时间序列，每个字段一列 array('d')，内存占用固定
+class TimeSeries:
+    def __init__(self, fields: Tuple[str, ...], capacity: int=3600) -> None:
+        if capacity <= 0:
+            raise ValueError("时间序列容量必须为正整数")
+        self.fields = tuple(fields)
+        self.capacity = capacity
+        self._times = array('d', bytes(8 * capacity))
+        self._cols = {f: array('d', bytes(8 * capacity)) for f in self.fields}
+        self._head = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _pos(self, i: int) -> int:
+        return (self._head - self._size + i) % self.capacity
+
+    def append(self, stamp: float, values: Dict[str, float]) -> None:
+        head = self._head
+        self._times[head] = stamp
+        for f, col in self._cols.items():
+            v = values.get(f)
+            col[head] = float('nan') if v is None else v
+        self._head = (head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def clear(self) -> None:
+        self._head = 0
+        self._size = 0
+
+    def _row(self, i: int) -> Dict[str, float]:
+        p = self._pos(i)
+        row = {'time': self._times[p]}
+        for f, col in self._cols.items():
+            row[f] = col[p]
+        return row
+
+    def latest(self) -> Optional[Dict[str, float]]:
+        return self._row(self._size - 1) if self._size else None
+
+    def last(self, n: int) -> List[Dict[str, float]]:
+        n = max(0, min(n, self._size))
+        return [self._row(i) for i in range(self._size - n, self._size)]
+
+    def window(self, seconds: float) -> List[Dict[str, float]]:
+        # 最近 seconds 秒内的所有采样点
+        start = time.time() - seconds
+        i = self._size
+        while i > 0 and self._times[self._pos(i - 1)] >= start:
+            i -= 1
+        return [self._row(j) for j in range(i, self._size)]
+
+    def column(self, field: str, n: int=None) -> List[float]:
+        col = self._cols[field]
+        n = self._size if n is None else max(0, min(n, self._size))
+        return [col[self._pos(i)] for i in range(self._size - n, self._size)]
@@ -0,0 +1,177 @@
+# 端到端吞吐基准：用 simulator.py 代替真实服务端，测量不同处理器数量与服务端数量下的
+# 分发吞吐、行读取到处理器执行的延迟、interact 往返时间、监督进程 CPU 与内存占用。
+#   python test/bench.py --rate 2000 --duration 5 --handlers 1,10,50 --servers 1,3
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from mcsr import BasicLogger, HandlerMonitor, ServerOutput, eargs
+from mcsr.core.server import Server, ServerLoader
+
+SIMULATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'simulator.py')
+BENCH_REGEX = r'#bench (\d+) ([\d.]+)$'
+
+# 常见插件的处理器形态，按序号轮流分配给除延迟探针外的处理器
+HANDLER_KINDS = (
+    lambda: ServerOutput(r'^(\S+) joined the game', message_only=True),
+    lambda: ServerOutput(r'^<(\S+)> (.*)', message_only=True),
+    lambda: ServerOutput(),
+    lambda: ServerOutput(level='WARN'),
+)
+
+
+class QuietLogger(BasicLogger):
+    def log(self, *args, **kwargs) -> None:
+        pass
+
+
+class Result:
+    def __init__(self) -> None:
+        self.latencies = []
+        self.rtts = []
+        self.handled = 0
+        self.calls = 0
+        self.max_seq = {}
+        self.timeouts = 0
+
+
+def percentile(values, p: float) -> float:
+    if not len(values):
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def rss_kib() -> int:
+    with open('/proc/self/status') as fp:
+        for row in fp:
+            if row.startswith('VmRSS:'):
+                return int(row.split()[1])
+    return 0
+
+
+def make_server(id: str, workdir: str, opts: argparse.Namespace) -> Server:
+    # ServerLoader 以空格切分命令，路径中不能含空格
+    loader = ServerLoader(sys.executable, os.path.join(workdir, 'server.jar'),
+                          args=[SIMULATOR, '--rate', str(opts.rate), '--duration', str(opts.duration),
+                                '--startup-delay', '0', '--seed', '1'])
+    server = Server(id, loader, QuietLogger(id), overflow_policy=opts.policy, sample_interval=None)
+    if opts.monitor:
+        server._event_bus.set_monitor(HandlerMonitor(logger=QuietLogger('monitor')))
+    return server
+
+
+def add_handlers(server: Server, n: int, result: Result, sync: bool) -> None:
+    def record() -> None:
+        now = time.time()
+        seq, sent = eargs.matched
+        result.handled += 1
+        result.latencies.append(now - float(sent))
+        if int(seq) > result.max_seq.get(server.id, 0):
+            result.max_seq[server.id] = int(seq)
+
+    def count() -> None:
+        result.calls += 1
+
+    async def async_record() -> None:
+        record()
+
+    async def async_count() -> None:
+        count()
+
+    probe, plugin = (record, count) if sync else (async_record, async_count)
+
+    server.on(ServerOutput(BENCH_REGEX), probe)
+    for i in range(n - 1):
+        server.on(HANDLER_KINDS[i % len(HANDLER_KINDS)](), plugin)
+
+
+async def interact_loop(server: Server, result: Result, interval: float) -> None:
+    while True:
+        begin = time.perf_counter()
+        matched = await server.interact('list', r'There are (\d+) of a max', timeout=5)
+        if matched is None:
+            result.timeouts += 1
+        else:
+            result.rtts.append(time.perf_counter() - begin)
+        await asyncio.sleep(interval)
+
+
+async def run_scenario(n_servers: int, n_handlers: int, opts: argparse.Namespace) -> dict:
+    result = Result()
+    with tempfile.TemporaryDirectory(prefix='mcsr_bench_') as workdir:
+        servers = [make_server(f's{i}', workdir, opts) for i in range(n_servers)]
+        for server in servers:
+            add_handlers(server, n_handlers, result, opts.sync)
+
+        run_tasks = [asyncio.create_task(server._run()) for server in servers]
+        await asyncio.gather(*(server.loaded_flag.wait() for server in servers))
+        rss_before = rss_kib()
+        cpu_begin = time.process_time()
+        begin = time.perf_counter()
+
+        probes = [asyncio.create_task(interact_loop(server, result, opts.interact_interval)) for server in servers]
+        await asyncio.sleep(opts.duration + opts.settle)
+        for t in probes:
+            t.cancel()
+        elapsed = time.perf_counter() - begin
+        cpu = time.process_time() - cpu_begin
+        rss_after = rss_kib()
+
+        await asyncio.gather(*(server.stop() for server in servers))
+        await asyncio.wait(run_tasks)
+
+    emitted = sum(result.max_seq.values())
+    return {
+        'servers': n_servers,
+        'handlers': n_handlers,
+        'lines/s': result.handled / opts.duration,
+        'lost': emitted - result.handled,
+        'p50 ms': percentile(result.latencies, 0.5) * 1000,
+        'p99 ms': percentile(result.latencies, 0.99) * 1000,
+        'max ms': percentile(result.latencies, 1.0) * 1000,
+        'rtt p50 ms': percentile(result.rtts, 0.5) * 1000,
+        'rtt p99 ms': percentile(result.rtts, 0.99) * 1000,
+        'cpu %': cpu / elapsed * 100,
+        'rss MiB': rss_after / 1024,
+        'rss +MiB': (rss_after - rss_before) / 1024,
+    }
+
+
+def print_table(rows: list) -> None:
+    columns = list(rows[0].keys())
+    cells = [[f'{v:.1f}' if isinstance(v, float) else str(v) for v in row.values()] for row in rows]
+    widths = [max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(columns)]
+    print('  '.join(c.rjust(w) for c, w in zip(columns, widths)))
+    for r in cells:
+        print('  '.join(v.rjust(w) for v, w in zip(r, widths)))
+
+
+async def main(opts: argparse.Namespace) -> None:
+    rows = []
+    for n_servers in opts.servers:
+        for n_handlers in opts.handlers:
+            rows.append(await run_scenario(n_servers, n_handlers, opts))
+            print(f'完成：{n_servers} 个服务端，{n_handlers} 个处理器', file=sys.stderr)
+    print_table(rows)
+
+
+def int_list(value: str) -> list:
+    return [int(v) for v in value.split(',') if v]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='MCSR 端到端吞吐基准')
+    parser.add_argument('--rate', type=float, default=2000, help='每个服务端每秒输出的行数')
+    parser.add_argument('--duration', type=float, default=5, help='每个场景持续输出的秒数')
+    parser.add_argument('--settle', type=float, default=1, help='输出结束后等待分发完成的秒数')
+    parser.add_argument('--handlers', type=int_list, default=[1, 10, 50], help='处理器数量，逗号分隔')
+    parser.add_argument('--servers', type=int_list, default=[1, 3], help='服务端数量，逗号分隔')
+    parser.add_argument('--policy', default='block', help='输出缓冲区溢出策略')
+    parser.add_argument('--interact-interval', type=float, default=0.2)
+    parser.add_argument('--sync', action='store_true', help='以同步函数注册处理器，在分发处直接调用')
+    parser.add_argument('--monitor', action='store_true', help='开启处理器监控，用于对比统计开销')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,147 @@
+# 输出匹配索引的字面量预筛检查：对有代表性的模式（分支、可选分组、局部标志、{0,n} 重复等）
+# 逐行比较 OutputMatchIndex.match 与 re.findall 的结果，并检查提取的必需字面量确实出现在每个匹配行中。
+#   python test/check_matcher.py
+import itertools
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcsr.model.matcher import OutputMatchIndex, required_literal
+
+PATTERNS = (
+    # 分支
+    r'(joined|left) the game',
+    r'^(\S+) (?:joined|left) the game',
+    r'ab|cd',
+    r'x(?:abc|abd)y',
+    r'Steve|Alex joined',
+    # 可选分组与量词
+    r'(foo)?bar',
+    r'a(bc)?d',
+    r'(ab){0,2}c',
+    r'x{0,3}yz',
+    r'(ab){2}c',
+    r'(?:abc)+d',
+    r'a(?:bc)*d',
+    r'ab*c',
+    r'a[bc]{1,2}d',
+    # 局部与全局标志
+    r'(?i:steve) joined',
+    r'(?i:steve and alex) x',
+    r'(?i)STEVE joined',
+    r'joined (?i:THE) game',
+    r'(?s)a.b',
+    # 断言、反向引用与常见服务端日志
+    r'(?=abc)ab',
+    r'a(?!bc)b',
+    r'(?<=<)(\S+)> hi',
+    r'(?P<c>[ab])(?P=c)z',
+    r'Done \((\d+(?:[.,]\d+)?)s\)!',
+    r'^<(\S+)> (.*)',
+    r'\bUUID of player (\S+) is ([0-9a-f-]+)',
+    r'There are (\d+) of a max of (\d+) players online',
+    r'[Ss]aved the game',
+    r'^$',
+)
+
+LINES = (
+    'Steve joined the game',
+    'Alex left the game',
+    'steve joined the game',
+    'STEVE JOINED the game',
+    'Steve joined THE game',
+    'Steve joined The game',
+    'Alex joined',
+    'Steve and Alex x', 'STEVE AND ALEX x',
+    'xabdy', 'xabcy', 'xaby',
+    'bar', 'foobar', 'fobar', 'ad', 'abcd', 'abd',
+    'c', 'abc', 'ababc', 'abababc', 'yz', 'xxxyz', 'xxxxyz',
+    'abcabcd', 'd', 'abcbcd', 'ac', 'abbc', 'abd', 'abcd', 'abbd',
+    'a\nb', 'ab', 'abc', 'abd', 'aab', 'aaz', 'abz', 'bbz',
+    '<Steve> hi', '<Alex> hello', 'Steve> hi',
+    'Done (12.345s)! For help, type "help"', 'Done (3,5s)!', 'Done (s)!',
+    'UUID of player Steve is 0f1e-aa', 'player Steve is',
+    'There are 3 of a max of 20 players online: a, b, c',
+    'Saved the game', 'saved the game', 'Saving the game',
+    '',
+)
+
+
+class Record:
+    def __init__(self, content: str) -> None:
+        self.content = content
+        self.message = content
+
+
+def expected(pattern: str, text: str):
+    found = re.findall(pattern, text)
+    return found[0] if len(found) else None
+
+
+def mutations(lines, rng: random.Random, count: int):
+    # 对样例行做删除、重复与大小写翻转，覆盖预筛命中但正则不匹配的情况
+    alphabet = sorted(set(''.join(lines)))
+    for _ in range(count):
+        text = list(rng.choice(lines))
+        for _ in range(rng.randint(1, 3)):
+            op = rng.randrange(4)
+            i = rng.randrange(len(text) + 1)
+            if op == 0 and i < len(text):
+                del text[i]
+            elif op == 1 and i < len(text):
+                text.insert(i, text[i])
+            elif op == 2 and i < len(text):
+                text[i] = text[i].swapcase()
+            else:
+                text.insert(i, rng.choice(alphabet))
+        yield ''.join(text)
+
+
+def check() -> int:
+    index = OutputMatchIndex()
+    for i, pattern in enumerate(PATTERNS):
+        index.add(i, pattern)
+    # 同一模式多次注册与匹配整行、只匹配消息部分的处理器
+    index.add('dup', PATTERNS[0])
+    index.add('message', PATTERNS[1], field='message')
+    index.add('all', None)
+
+    rng = random.Random(2026)
+    lines = list(LINES) + list(mutations(LINES, rng, 3000))
+    checked = 0
+    for text in lines:
+        got = dict(index.match(Record(text)))
+        want = {i: expected(p, text) for i, p in enumerate(PATTERNS)}
+        want['dup'] = want[0]
+        want['message'] = want[1]
+        for key, value in want.items():
+            if value is None:
+                assert key not in got, f"{PATTERNS[key] if isinstance(key, int) else key!r} 不应匹配 {text!r}"
+            else:
+                assert key in got, f"{PATTERNS[key] if isinstance(key, int) else key!r} 应匹配 {text!r}"
+                assert got[key] == value, f"{key!r} 匹配 {text!r} 的结果 {got[key]!r} 与 re.findall 的 {value!r} 不同"
+        assert got['all'] is None
+        checked += 1
+
+    for pattern in PATTERNS:
+        literal = required_literal(re.compile(pattern))
+        if literal is None:
+            continue
+        for text in lines:
+            if re.search(pattern, text):
+                assert literal in text, f"{pattern!r} 的必需字面量 {literal!r} 不在匹配行 {text!r} 中"
+
+    # 忽略大小写的模式不能做区分大小写的预筛
+    for pattern in (r'(?i)steve', r'(?i:steve)'):
+        assert required_literal(re.compile(pattern)) is None, pattern
+    # 匹配结果按注册顺序返回
+    order = [key for key, _ in index.match(Record('Steve joined the game'))]
+    assert order == sorted(order, key=list(itertools.chain(range(len(PATTERNS)), ('dup', 'message', 'all'))).index)
+    return checked
+
+
+if __name__ == '__main__':
+    print(f"已检查 {check()} 行、{len(PATTERNS)} 个模式，结果与 re.findall 一致")
@@ -6,9 +6,12 @@ from mcsr import MCSR, ServerLoaded, eargs, server
 
 bak_nums = 5
 interval_time = 20*60
+backups = MCSR.metrics.counter('autosave_backups_total', '自动保存完成次数', ('server',))
 
 
-@MCSR.server().register(ServerLoaded)
+# 定时循环不会结束，以 aware 任务单独运行，避免阻塞其他 ServerLoaded 处理器；
+# 服务端停止时任务被取消，重启后不会留下重复的备份循环
+@MCSR.server().register(ServerLoaded, aware=True)
 async def backup_main():
     global interval_time
     while True:
@@ -60,6 +63,7 @@ async def backup():
     fresh_day_bak(save_path)
     with open(os.path.join(server.cwd, 'auto-save.log'), 'a') as fp:
         print(get_time_str(), f'成功完成自动保存，保存为：{save_name}', flush=True, file=fp)
+    backups.labels(server.id).inc()
 
 
     bak_paths = [os.path.join(backup_folder, dir) for dir in os.listdir(backup_folder)]
@@ -1,6 +1,7 @@
-from mcsr import (MCSR, CmdParser, MCSR_AllLoaded, MCSR_AllStopped,
-                  MCSR_ExtsLoaded, MCSR_Stdin, ServerBeforeStart, ServerLoaded,
-                  ServerOutput, ServerStopped, eargs, server)
+from mcsr import (MCSR, CmdParser, HandlerScope, MCSR_AllLoaded,
+                  MCSR_AllStopped, MCSR_ExtsLoaded, MCSR_Stdin, Priority,
+                  ServerBeforeStart, ServerLoaded, ServerOutput, ServerStopped,
+                  eargs, server)
 
 cur_server = next(iter(MCSR.servers.values()))
 active_flags = {id: True for id in MCSR.server_ids}
@@ -12,16 +13,16 @@ async def detect():
     async def handle_error():
         MCSR.logger.log(f'服务端 {server.id} 启动失败，即将强行关闭')
         await server.force_stop()
-    server.on(ServerOutput('Failed to start the minecraft server'), handle_error)
+    server.on(ServerOutput('Failed to start the minecraft server'), handle_error, scope=HandlerScope.run)
 
 
 @MCSR.server().register(ServerLoaded)
 async def afterloaded():
     server.logger.log(f"服务端 {server.id} 已完成加载")
-    async def OutputManager():
+    def OutputManager():
         if active_flags[server.id] and 'No player was found' not in eargs.output:
             server.logger.log(eargs.output)
-    server.on(ServerOutput, OutputManager)
+    server.on(ServerOutput, OutputManager, scope=HandlerScope.run)
 
 
 @MCSR.server().register(ServerStopped)
@@ -68,11 +69,8 @@ async def InputManager():
     output = eargs.output
     
     matched = parser.parse(output)
-    if cur_server._lock.locked():
-        MCSR.logger.log('当前有任务正在等待输出，请等待其完成后再与服务端交互')
-        return
     if matched is None:
-        cur_server.send(output)
+        cur_server.send(output, Priority.admin)
         return
     elif matched.verify('io-change', 1):
         await stdin_change(matched)
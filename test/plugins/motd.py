@@ -1,4 +1,4 @@
-from mcsr import MCSR, ServerOutput, eargs, server
+from mcsr import MCSR, ExecPolicy, Priority, ServerOutput, eargs, server
 from mcsr import JsonText, Colors, Texts
 from datetime import datetime
 from time import time
@@ -41,7 +41,7 @@ def get_play_days(username: str) -> int:
     return play_datas[username][1]
 
 
-@MCSR.server("main").register(ServerOutput(r' (\S+) joined the game'))
+@MCSR.server("main").register(ServerOutput(r'^(\S+) joined the game', message_only=True), policy=ExecPolicy.serial)
 async def main_motd():
     global records
     username = eargs.matched
@@ -57,11 +57,11 @@ async def main_motd():
         JsonText('main 子服', color=Colors.aqua),
         JsonText('是 HWS 的核心，所有的生存活动将在这里展开，尽情探索叭~', color=Colors.green)
     ).format()
-    server.send(f'/tellraw {username} {text}')
+    server.send(f'/tellraw {username} {text}', Priority.cosmetic)
     records['main'][username] = get_day()
 
 
-@MCSR.server("mirrored").register(ServerOutput(r' (\S+) joined the game'))
+@MCSR.server("mirrored").register(ServerOutput(r'^(\S+) joined the game', message_only=True), policy=ExecPolicy.serial)
 async def mirrored_motd():
     global records
     username = eargs.matched
@@ -79,11 +79,11 @@ async def mirrored_motd():
         JsonText('main 子服', color=Colors.aqua),
         JsonText('的创造模式镜像，可以开展各种测试和调试~', color=Colors.green)
     ).format()
-    server.send(f'/tellraw {username} {text}')
+    server.send(f'/tellraw {username} {text}', Priority.cosmetic)
     records['mirrored'][username] = get_day()
 
 
-@MCSR.server("creative").register(ServerOutput(r' (\S+) joined the game'))
+@MCSR.server("creative").register(ServerOutput(r'^(\S+) joined the game', message_only=True), policy=ExecPolicy.serial)
 async def creative_motd():
     global records
     username = eargs.matched
@@ -99,5 +99,5 @@ async def creative_motd():
         JsonText('creative 子服', color=Colors.aqua),
         JsonText('是一个与其他子服无关的创造服，尽情玩耍吧~', color=Colors.green)
     ).format()
-    server.send(f'/tellraw {username} {text}')
+    server.send(f'/tellraw {username} {text}', Priority.cosmetic)
     records['creative'][username] = get_day()
\ No newline at end of file
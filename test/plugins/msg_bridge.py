@@ -1,4 +1,4 @@
-from mcsr import eargs, server, MCSR, ServerLoaded, ServerOutput, MCSR_AllLoaded
+from mcsr import server, MCSR, Priority, ServerLoaded, ServerOutput, MCSR_AllLoaded
 from mcsr import JsonText, Texts, Colors
 
 
@@ -7,13 +7,15 @@ async def greeting():
     MCSR.logger.log("消息 bridge 已启动")
 
 
-@MCSR.server().register(ServerLoaded)
+# aware 任务随服务端停止被取消，订阅随之移除，重启后不会重复注册
+@MCSR.server().register(ServerLoaded, aware=True)
 async def bridge():
-    server.on(ServerOutput(r' ([a-zA-Z0-9]+) » (.*)'), forward)
+    async with server.subscribe(ServerOutput(r'^([a-zA-Z0-9]+) » (.*)', message_only=True)) as sub:
+        async for rec in sub:
+            forward(*rec.matched)
 
 
-async def forward():
-    username, msg = eargs.matched
+def forward(username: str, msg: str):
     text = Texts(
         JsonText('[', color=Colors.dark_gray),
         JsonText(f'{server.id} 子服', color=Colors.white),
@@ -22,6 +24,6 @@ async def forward():
         JsonText(' » ', color=Colors.dark_gray),
         JsonText(f'{msg}', color=Colors.white)
     ).format()
-    MCSR.broadcast(f'/tellraw @a {text}', exclude_self=True)
+    MCSR.broadcast(f'/tellraw @a {text}', exclude_self=True, priority=Priority.cosmetic)
 
 
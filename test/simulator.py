@@ -0,0 +1,163 @@
+# 模拟 Minecraft 服务端控制台的替身进程，无需 Minecraft 与 Java 即可驱动 MCSR。
+# 通过 ServerLoader 启动：java_path 设为 Python 解释器，args 以本脚本路径开头，
+# 末尾追加的 "-jar <path> nogui" 会被忽略，例如：
+#   ServerLoader(sys.executable, '/tmp/sim/server.jar', args=[__file__, '--rate', '500'])
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+PLAYERS = ['Steve', 'Alex', 'Notch', 'jeb_', 'Dinnerbone']
+RANDOM_LINES = [
+    'Server thread/INFO]: <{p}> hello everyone',
+    'Server thread/INFO]: {p} joined the game',
+    'Server thread/INFO]: {p} left the game',
+    "Server thread/WARN]: Can't keep up! Is the server overloaded? Running 2034ms or 40 ticks behind",
+    'Server thread/WARN]: {p} moved too quickly! -12.3,0.0,4.5',
+    'Worker-Main-3/WARN]: Ignoring heightmap data for chunk [12, -7], size does not match',
+    'Server thread/INFO]: [{p}: Teleported {p} to 0.5, 64.0, 0.5]',
+]
+
+_out_lock = threading.Lock()
+
+
+def stamp() -> str:
+    return time.strftime('%H:%M:%S')
+
+
+def emit(*msgs: str, level: str='INFO', thread: str='Server thread', err: bool=False) -> None:
+    stream = sys.stderr if err else sys.stdout
+    with _out_lock:
+        stream.write(''.join(f'[{stamp()}] [{thread}/{level}]: {m}\n' for m in msgs))
+        stream.flush()
+
+
+class Simulator:
+    def __init__(self, opts: argparse.Namespace) -> None:
+        self.opts = opts
+        self.stopping = threading.Event()
+        self.seq = 0
+        self.rng = random.Random(opts.seed)
+        self.script = None
+        if opts.script:
+            with open(opts.script, encoding='utf-8') as fp:
+                self.script = [row.rstrip('\n') for row in fp if row.strip()]
+
+    def boot(self) -> None:
+        emit('Starting minecraft server version 1.20.4')
+        emit('Loading properties')
+        emit('Preparing level "world"')
+        time.sleep(self.opts.startup_delay)
+        emit('Preparing start region for dimension minecraft:overworld')
+        emit(f'Done ({self.opts.startup_delay + 0.5:.3f}s)! For help, type "help"')
+
+    def next_line(self) -> str:
+        self.seq += 1
+        if self.script is not None:
+            body = self.script[(self.seq - 1) % len(self.script)]
+        else:
+            body = self.rng.choice(RANDOM_LINES).format(p=self.rng.choice(PLAYERS))
+        # 附带序号与发出时刻，便于基准测试统计端到端延迟
+        return f'[{stamp()}] [{body} #bench {self.seq} {time.time():.6f}'
+
+    def traffic(self) -> None:
+        rate = self.opts.rate
+        if rate <= 0:
+            return
+        tick = 0.01
+        per_tick = rate * tick
+        carry = 0.0
+        next_tick = time.monotonic()
+        deadline = next_tick + self.opts.duration if self.opts.duration else None
+        while not self.stopping.is_set():
+            carry += per_tick
+            n = int(carry)
+            carry -= n
+            if n:
+                data = ''.join(self.next_line() + '\n' for _ in range(n))
+                with _out_lock:
+                    sys.stdout.write(data)
+                    sys.stdout.flush()
+            next_tick += tick
+            if deadline is not None and next_tick >= deadline:
+                return
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    def crash(self, code: int=1) -> None:
+        emit('Encountered an unexpected exception', level='ERROR')
+        emit('java.lang.IllegalStateException: simulated crash', err=True)
+        with _out_lock:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        os._exit(code)
+
+    def handle(self, cmd: str) -> bool:
+        cmd = cmd.strip().lstrip('/')
+        name, _, rest = cmd.partition(' ')
+        if not name:
+            return True
+        if name == 'stop':
+            emit('Stopping the server', 'Stopping server', 'Saving players', 'Saving worlds')
+            return False
+        if name == 'list':
+            emit(f'There are {self.opts.players} of a max of 20 players online: {", ".join(PLAYERS[:self.opts.players])}')
+        elif name == 'save-all':
+            emit('Saving the game (this may take a moment!)')
+            time.sleep(self.opts.save_delay)
+            emit('ThreadedAnvilChunkStorage (world): All chunks are saved')
+            emit('Saved the game')
+        elif name == 'save-off':
+            emit('Automatic saving is now disabled')
+        elif name == 'save-on':
+            emit('Automatic saving is now enabled')
+        elif name == 'tick' and rest == 'query':
+            emit('The game is running normally', 'Target tick rate: 20.0 per second.',
+                 f'Average time per tick: {self.rng.uniform(5, 60):.1f}ms (Target: 50.0ms)')
+        elif name == 'say':
+            emit(f'[Server] {rest}')
+        elif name == 'tellraw':
+            pass
+        elif name == 'crash':
+            self.crash(int(rest) if rest.isdigit() else 1)
+        else:
+            emit('Unknown or incomplete command, see below for error')
+        return True
+
+    def run(self) -> None:
+        self.boot()
+        timer = None
+        if self.opts.crash_after is not None:
+            # 正常停止时取消，不能让计时器拖住进程并以崩溃退出码结束
+            timer = threading.Timer(self.opts.crash_after, self.crash)
+            timer.daemon = True
+            timer.start()
+        threading.Thread(target=self.traffic, daemon=True).start()
+        for row in sys.stdin:
+            if not self.handle(row):
+                break
+        if timer is not None:
+            timer.cancel()
+        self.stopping.set()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='MCSR 服务端模拟器')
+    parser.add_argument('--rate', type=float, default=0, help='每秒输出的模拟日志行数')
+    parser.add_argument('--duration', type=float, default=None, help='模拟输出持续的秒数，默认持续到停止')
+    parser.add_argument('--script', default=None, help='按顺序循环输出的脚本文件，每行为 "线程/级别]: 消息"')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--players', type=int, default=1)
+    parser.add_argument('--startup-delay', type=float, default=0.2)
+    parser.add_argument('--save-delay', type=float, default=0.3)
+    parser.add_argument('--crash-after', type=float, default=None, help='启动后若干秒模拟崩溃退出')
+    # ServerLoader 追加的 "-jar <path> nogui" 参数在此忽略
+    opts, _ = parser.parse_known_args()
+    Simulator(opts).run()
+
+
+if __name__ == '__main__':
+    main()
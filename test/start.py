@@ -16,7 +16,9 @@ def get_ext_path(filename: str) -> str:
 
 MCSR.add_server(id='main', java_path=java_path, server_jar_path=get_server_jar('main'), args=args, world_name=world_name)
 MCSR.add_server(id='creative', java_path=java_path, server_jar_path=get_server_jar('creative'), args=args, world_name=world_name)
-MCSR.add_server(id='mirrored', java_path=java_path, server_jar_path=get_server_jar('mirrored'), args=args, world_name=world_name)
+MCSR.add_server(id='mirrored', java_path=java_path, server_jar_path=get_server_jar('mirrored'), args=args, world_name=world_name, depends_on=['main'])
+MCSR.set_startup(max_concurrent=1, wait_loaded=True)
+MCSR.serve_metrics(port=9108)
 MCSR.load_extension(get_ext_path('console.py'))
 MCSR.load_extension(get_ext_path('autosave.py'))
 MCSR.load_extension(get_ext_path('msg_bridge.py'))